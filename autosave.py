@@ -0,0 +1,105 @@
+import os
+import time
+import tempfile
+import threading
+from numbers import Real
+from typing import Self
+from typing import Optional
+
+import pathfile
+from path import Path
+
+
+DEFAULT_FILE = os.path.join(
+    os.path.expanduser('~'), '.coyote', 'autosave.path',
+)
+
+
+def restore(filename: str=DEFAULT_FILE) -> Optional[Path]:
+    # the last autosave, None if there is none or it can't be read
+    try:
+        return pathfile.load(filename)
+    except (OSError, ValueError):
+        return None
+
+
+# Saves snapshots of the path on a background thread, so the frame loop
+# only pays for copying the path. A save happens once no new snapshot has
+# come in for delay seconds, and replaces the file atomically: it is
+# written next to it and renamed over it, so a crash mid-save leaves the
+# previous autosave intact. The last error, if any, is kept in error.
+class Autosaver(object):
+    def __init__(self: Self,
+                 filename: str=DEFAULT_FILE,
+                 delay: Real=1.0) -> None:
+        self.filename = filename
+        self.delay = delay
+        self.saves = 0
+        self.error = None
+        self._pending = None
+        self._due = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name='autosave', daemon=True,
+        )
+        self._thread.start()
+
+    def request(self: Self, path: Path) -> None:
+        snapshot = path.copy()
+        with self._condition:
+            self._pending = snapshot
+            self._due = time.monotonic() + self.delay
+            self._condition.notify()
+
+    def close(self: Self) -> None:
+        # saves anything pending right away, then stops the thread
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self: Self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._pending is None:
+                        self._condition.wait()
+                        continue
+                    wait = self._due - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                path, self._pending = self._pending, None
+            if path is not None:
+                self._write(path)
+            elif self._closed:
+                return None
+
+    def _write(self: Self, path: Path) -> None:
+        # a temporary file of its own, so two windows saving to the same
+        # autosave can't write into each other's
+        temp = None
+        try:
+            directory = os.path.dirname(self.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handle, temp = tempfile.mkstemp(
+                suffix='.tmp',
+                prefix=os.path.basename(self.filename) + '.',
+                dir=directory or None,
+            )
+            with os.fdopen(handle, 'wb') as file:
+                pathfile.write_binary(path, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp, self.filename)
+        except OSError as error:
+            self.error = error
+            if temp is not None:
+                try:
+                    os.remove(temp)
+                except OSError:
+                    pass
+        else:
+            self.saves += 1
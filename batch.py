@@ -0,0 +1,167 @@
+"""Generate OpMode code for saved paths without opening Coyote.
+
+Run ``python batch.py PATH_FILE ... -o OUT_DIR``. Every path file is turned
+into ``OUT_DIR/<name>.java`` with the same ``start.txt``/``leg.txt``
+templates and motion profile timeouts as the "Copy code" button, spread
+over a pool of processes.
+Nothing here imports pygame, so it runs on machines without a display.
+"""
+import os
+import sys
+import math
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+
+import pathfile
+from core import templates
+from core import gen_code
+from core import gen_data_path
+from core import Limits
+from core import leg_times
+
+
+def out_file(filename: str, out_dir: str) -> str:
+    # the .java file a path file is turned into
+    name = os.path.splitext(os.path.basename(filename))[0]
+    return os.path.join(out_dir, name + '.java')
+
+
+def gen_file(filename: str,
+             out_dir: str,
+             template_dir: str,
+             limits: Limits,
+             margin: float) -> tuple[str, int, float]:
+    # (output file, number of legs, seconds) for one path file
+    start_time = time.perf_counter()
+    path = pathfile.load(filename)
+    code = gen_code(
+        templates.get(os.path.join(template_dir, 'start.txt')),
+        templates.get(os.path.join(template_dir, 'leg.txt')),
+        path.poses(),
+        [leg + margin for leg in leg_times(path.poses(), limits)],
+    )
+    out = out_file(filename, out_dir)
+    with open(out, 'w') as file:
+        file.write(code)
+    return (out, max(len(path) - 1, 0), time.perf_counter() - start_time)
+
+
+def _attempt(func, *args) -> tuple:
+    # (result, None), or (None, error) for a file that could not be done
+    try:
+        return (func(*args), None)
+    except (OSError, ValueError) as error:
+        return (None, error)
+
+
+def _jobs(text: str) -> int:
+    try:
+        jobs = int(text)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(
+            f'has to be a whole number of at least 1, not {text!r}',
+        )
+    return jobs
+
+
+def main(argv: list[str]=None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Generate OpMode code for Coyote path files.',
+    )
+    parser.add_argument('paths', nargs='+', help='path files')
+    parser.add_argument(
+        '-o', '--out', default='.', help='directory for the .java files',
+    )
+    parser.add_argument(
+        '-t', '--templates', default=gen_data_path('code'),
+        help='directory with start.txt and leg.txt',
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=_jobs, default=os.cpu_count(),
+        help='worker processes, 1 to run in this process',
+    )
+    default = Limits()
+    parser.add_argument(
+        '--max-velocity', type=float, default=default.max_velocity,
+        help='robot top speed in inches per second',
+    )
+    parser.add_argument(
+        '--acceleration', type=float, default=default.acceleration,
+        help='robot acceleration in inches per second squared',
+    )
+    parser.add_argument(
+        '--angular-rate', type=float, default=default.angular_rate,
+        help='robot turning rate in degrees per second',
+    )
+    parser.add_argument(
+        '--margin', type=float, default=1.0,
+        help='seconds added to the estimated time of each leg',
+    )
+    args = parser.parse_args(argv)
+    try:
+        limits = Limits(
+            args.max_velocity, args.acceleration, args.angular_rate,
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    if not 0 <= args.margin < math.inf:
+        parser.error('the margin has to be a finite number of seconds')
+    # files with the same name in different directories would overwrite
+    # each other's code, so nothing is written
+    outs = {}
+    for filename in args.paths:
+        outs.setdefault(
+            os.path.normcase(out_file(filename, args.out)), [],
+        ).append(filename)
+    clashes = [names for names in outs.values() if len(names) > 1]
+    if clashes:
+        parser.error('path files with the same name: ' + '; '.join(
+            ', '.join(names) for names in clashes
+        ))
+
+    os.makedirs(args.out, exist_ok=True)
+    start_time = time.perf_counter()
+    if args.jobs == 1:
+        results = (
+            (filename, _attempt(
+                gen_file, filename, args.out, args.templates, limits,
+                args.margin,
+            ))
+            for filename in args.paths
+        )
+    else:
+        executor = ProcessPoolExecutor(max_workers=args.jobs)
+        futures = {
+            executor.submit(
+                _attempt, gen_file, filename, args.out, args.templates,
+                limits, args.margin,
+            ): filename
+            for filename in args.paths
+        }
+        results = (
+            (futures[future], future.result())
+            for future in as_completed(futures)
+        )
+
+    failed = 0
+    for filename, (result, error) in results:
+        if error is not None:
+            failed += 1
+            print(f'{filename}: {error}', file=sys.stderr)
+            continue
+        out, legs, seconds = result
+        print(f'{filename} -> {out}: {legs} legs, {seconds * 1000:.2f} ms')
+    if args.jobs != 1:
+        executor.shutdown()
+
+    print(f'{len(args.paths) - failed} of {len(args.paths)} files in '
+          f'{(time.perf_counter() - start_time) * 1000:.2f} ms')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1020 @@
+"""Rough timing for Coyote's hot paths.
+
+Run from the repository root with ``python bench.py [name ...]``. The dummy
+SDL video driver is used so it also works on machines without a display.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import subprocess
+from typing import Callable
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+
+def _time(func: Callable, repeat: int) -> float:
+    # milliseconds per call
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _report(name: str, **results: float) -> None:
+    print(name)
+    for key, value in results.items():
+        if isinstance(value, float):
+            value = f'{value:.4f}'
+        print(f'  {key:<24} {value:>10}')
+
+
+def _make_game(points: int=40, seed: int=0):
+    import main
+
+    from path import Path
+
+    game = main.Game()
+    game._settings['autosave'] = 0 # leave the real autosave alone
+    rng = random.Random(seed)
+    game._view.assign(Path(
+        (rng.uniform(-72, 72), rng.uniform(-72, 72), rng.uniform(-180, 180))
+        for _ in range(points)
+    ))
+    game._finish_change()
+    game._update_points_list()
+    return game
+
+
+def bench_idle_frames(frames: int=300) -> None:
+    results = {}
+    for mode in (0, 1):
+        game = _make_game()
+        game._settings['dirty_rects'] = mode
+        game._step(0) # first frame always draws everything
+        results[('full', 'dirty rects')[mode] + ' (ms/frame)'] = _time(
+            lambda: game._step(0), frames,
+        )
+    _report('idle frames, 40 points', **results)
+
+
+def bench_damage(points: int=40, drags: int=20) -> None:
+    import pygame as pg
+
+    # dragging only redraws around the point, which has to leave the same
+    # pixels as redrawing everything. Antialiasing where a redrawn part of
+    # the line starts or ends may be a few levels off; a stale line is
+    # tens of levels off.
+    results = {}
+    for curve in (False, True):
+        game = _make_game(points)
+        game._widgets['curve'].state = curve
+        game._mark_path_dirty()
+        game._step(0)
+        rng = random.Random(0)
+        stale = 0
+        for _ in range(drags):
+            point = game._view.points[rng.randrange(points)]
+            game._step(0, [pg.Event(
+                pg.MOUSEBUTTONDOWN, pos=(int(point[0]), int(point[1])),
+                button=1,
+            )])
+            for _ in range(5):
+                game._step(0, [pg.Event(
+                    pg.MOUSEMOTION,
+                    pos=(0, 0),
+                    rel=(rng.randint(-40, 40), rng.randint(-40, 40)),
+                    buttons=(1, 0, 0),
+                )])
+            game._step(0, [pg.Event(pg.MOUSEBUTTONUP, pos=(0, 0), button=1)])
+            partial = pg.image.tobytes(game._layers['path'], 'RGB')
+            game._mark_path_dirty()
+            game._step(0)
+            full = pg.image.tobytes(game._layers['path'], 'RGB')
+            if partial != full:
+                stale += sum(
+                    abs(old - new) > 8 for old, new in zip(partial, full)
+                )
+        results[('straight', 'curve')[curve] + ' stale values'] = stale
+        if stale:
+            raise AssertionError('dragging left stale pixels behind')
+    _report(f'redrawing around {drags} drags, {points} points', **results)
+
+
+def bench_footprints(frames: int=100) -> None:
+    game = _make_game()
+    game._settings['dirty_rects'] = 0
+
+    def uncached() -> None:
+        game._footprints.clear()
+        game._mark_path_dirty()
+        game._step(0)
+
+    def cached() -> None:
+        game._mark_path_dirty()
+        game._step(0)
+
+    results = {
+        'uncached (ms/frame)': _time(uncached, frames),
+        'cached (ms/frame)': _time(cached, frames),
+    }
+    results.update(game._footprints.stats)
+    _report('full redraw, 40 footprints', **results)
+
+
+def bench_visualizer(frames: int=300) -> None:
+    game = _make_game()
+    game._step(0)
+
+    def rebuilt() -> None:
+        if not game._visualizer_playing:
+            game._visualize()
+        game._mark_path_dirty()
+        game._step(1 / 60)
+
+    def layered() -> None:
+        if not game._visualizer_playing:
+            game._visualize()
+        game._step(1 / 60)
+
+    _report(
+        'visualizer playing, 40 points',
+        **{
+            'path redrawn (ms/frame)': _time(rebuilt, frames),
+            'path layer (ms/frame)': _time(layered, frames),
+        },
+    )
+
+
+def bench_trajectory(sizes: tuple[int, ...]=(100, 1_000, 10_000),
+                     seeks: int=10_000) -> None:
+    from core import Trajectory
+
+    rng = random.Random(0)
+    for size in sizes:
+        points = [
+            (rng.uniform(0, 600), rng.uniform(0, 600)) for _ in range(size)
+        ]
+        headings = [rng.uniform(-180, 180) for _ in range(size)]
+        build_time = _time(lambda: Trajectory(points, headings), 3)
+        trajectory = Trajectory(points, headings)
+        times = [
+            rng.uniform(0, trajectory.duration) for _ in range(seeks)
+        ]
+        start = time.perf_counter()
+        for seek in times:
+            trajectory.pose_at(seek)
+        _report(
+            f'visualizer trajectory, {size} points',
+            **{
+                'build (ms)': build_time,
+                'seek (us)': (time.perf_counter() - start) / seeks * 1e6,
+            },
+        )
+
+
+def bench_idle_cpu(seconds: float=2) -> None:
+    # an idle window in three loops: uncapped and redrawing everything,
+    # including the path, every frame, like before idle mode; capped with
+    # dirty rects but never sleeping; and idle mode. Wakeups are frames
+    # run, so they show the sleeping even where cpu % is too noisy to.
+    import pygame as pg
+
+    results = {}
+    for name in ('full redraws', 'busy loop', 'idle mode'):
+        game = _make_game()
+        full = name == 'full redraws'
+        game._settings['idle'] = name == 'idle mode'
+        game._settings['dirty_rects'] = not full
+        if full:
+            game._GAME_SPEED = 0 # clock.tick(0) does not wait
+        game._step(0)
+        frames = 0
+        step = game._step
+
+        def counted(*args) -> None:
+            nonlocal frames
+            frames += 1
+            if full:
+                game._mark_path_dirty()
+            step(*args)
+
+        game._step = counted
+        pg.time.set_timer(pg.QUIT, int(seconds * 1000), loops=1)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        game.run()
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - wall
+        results[name + ' (cpu %)'] = cpu / wall * 100
+        results[name + ' (wakeups/s)'] = frames / wall
+    _report(f'idle window for {seconds} s, 40 points', **results)
+    if results['idle mode (wakeups/s)'] > 5:
+        raise AssertionError('idle mode did not sleep')
+
+
+def bench_hit_tests(points: int=10_000, clicks: int=200) -> None:
+    import pygame as pg
+    from spatial import SpatialGrid
+
+    rng = random.Random(0)
+    screen_points = [
+        pg.Vector2(rng.uniform(0, 810), rng.uniform(0, 810))
+        for _ in range(points)
+    ]
+    targets = [
+        pg.Vector2(rng.uniform(0, 810), rng.uniform(0, 810))
+        for _ in range(clicks)
+    ]
+    grid = SpatialGrid()
+
+    def linear() -> None:
+        # the old pick then insert-on-line scans
+        for vector in targets:
+            for i in range(len(screen_points) - 1, -1, -1):
+                if vector.distance_to(screen_points[i]) <= 8:
+                    break
+            else:
+                for dex in range(1, len(screen_points)):
+                    prev = screen_points[dex - 1]
+                    difference = screen_points[dex] - prev
+                    t = pg.math.clamp(
+                        difference.dot(vector - prev)
+                        / difference.magnitude_squared(),
+                        0, 1,
+                    )
+                    if vector.distance_to(prev + t * difference) <= 4:
+                        break
+
+    def indexed() -> None:
+        for vector in targets:
+            if grid.pick(vector, 8) == -1:
+                grid.pick_segment(vector, 4)
+
+    def edit() -> None:
+        dex = rng.randrange(len(grid))
+        grid.move(dex, (rng.uniform(0, 810), rng.uniform(0, 810)))
+        grid.insert(dex, (rng.uniform(0, 810), rng.uniform(0, 810)))
+        grid.delete(dex)
+
+    _report(
+        f'hit tests, {points} points',
+        **{
+            'rebuild (ms)': _time(lambda: grid.rebuild(screen_points), 3),
+            'linear (ms/click)': _time(linear, 1) / clicks,
+            'grid (ms/click)': _time(indexed, 1) / clicks,
+            'move+insert+delete (ms)': _time(edit, 1000),
+        },
+    )
+
+
+def bench_drag(points: int=100, frames: int=10, per_frame: int=8) -> None:
+    import pygame as pg
+
+    game = _make_game(points)
+    game._step(0)
+    game._clicking = game._selected = 0
+    motion = [
+        pg.Event(pg.MOUSEMOTION, pos=(400, 400), rel=(1, 0), buttons=(1, 0, 0))
+        for _ in range(per_frame)
+    ]
+
+    def per_event() -> None:
+        # what applying every motion event on its own costs
+        for event in motion:
+            game._handle_events([event])
+
+    def coalesced() -> None:
+        game._handle_events(motion)
+        times.append(game._stats['event_time'])
+
+    times = []
+    results = {
+        'per event (ms/frame)': _time(per_event, frames),
+        'coalesced (ms/frame)': _time(coalesced, frames),
+    }
+    results['slowest frame (ms)'] = max(times) * 1000
+    _report(
+        f'dragging, {points} points, {per_frame} motion events/frame',
+        **results,
+    )
+
+
+def bench_spline(points: int=200, frames: int=60) -> None:
+    import pygame as pg
+
+    results = {}
+    for curve in (False, True):
+        game = _make_game(points)
+        game._widgets['curve'].state = curve
+        game._update_curve()
+        game._step(0)
+        game._clicking = game._selected = points // 2
+        spline = game._view.spline
+        builds = spline.builds
+        moves = [
+            [pg.Event(pg.MOUSEMOTION, pos=(400, 400), rel=(direction, 0),
+                      buttons=(1, 0, 0))]
+            for direction in (3, -3) * (frames // 2)
+        ]
+
+        def dragged() -> None:
+            game._step(1 / 60, moves.pop())
+
+        name = ('straight', 'curve')[curve]
+        results[f'{name} (ms/frame)'] = _time(dragged, frames)
+        if curve:
+            results['segments sampled/frame'] = (
+                (spline.builds - builds) / frames
+            )
+    _report(f'dragging a point, {points} points', **results)
+
+
+def _random_edit(editor, rng: random.Random) -> None:
+    # one edit, undo or redo of the kinds the app makes, on the field
+    from path import Path
+
+    count = len(editor.path)
+    pos = (rng.uniform(-72, 72), rng.uniform(-72, 72))
+    roll = rng.random()
+    if roll < 0.35 or count == 0:
+        editor.insert(rng.randint(0, count), pos, rng.uniform(-180, 180))
+    elif roll < 0.55:
+        editor.delete(rng.choice((0, count - 1, rng.randrange(count))))
+    elif roll < 0.8:
+        editor.move(rng.randrange(count), (*pos, rng.uniform(-180, 180)))
+    elif roll < 0.83:
+        editor.flip()
+    elif roll < 0.85:
+        editor.replace(Path(editor.path.poses()))
+    elif roll < 0.93:
+        editor.undo()
+    else:
+        editor.redo()
+    editor.commit()
+
+
+def bench_spline_bounds(edits: int=600, crowded: int=200) -> None:
+    # the segment bounds patched into the grid against a spline without a
+    # grid, which samples everything from scratch, after random edits and
+    # after inserts between the same two points run the grid's order keys
+    # out of precision and it rebuilds
+    from core import PathEditor
+    from spline import Spline
+
+    editor = PathEditor((144, 144), (810, 810))
+    view = editor.view
+    rng = random.Random(0)
+    checks = 0
+
+    def check() -> None:
+        nonlocal checks
+        points = view.points
+        fresh = Spline()
+        fresh.reset(len(points))
+        for _ in range(5):
+            left, top = rng.uniform(0, 800), rng.uniform(0, 800)
+            box = (
+                left, top,
+                left + rng.uniform(0, 200), top + rng.uniform(0, 200),
+            )
+            pos = (rng.uniform(0, 810), rng.uniform(0, 810))
+            if (view.spline.near(points, *box) != fresh.near(points, *box)
+                    or view.spline.pick(points, pos, 20)
+                    != fresh.pick(points, pos, 20)):
+                raise AssertionError('spline bounds out of date')
+        if not set(view.grid._bounds) <= set(view.grid._keys[1:]):
+            raise AssertionError('bounds left behind for deleted points')
+        checks += 1
+
+    start = time.perf_counter()
+    for _ in range(edits):
+        _random_edit(editor, rng)
+        if rng.random() < 0.5:
+            check()
+    editor.clear()
+    for dex in range(6):
+        editor.insert(dex, (dex * 10 - 30, dex % 2 * 20))
+    for dex in range(crowded):
+        editor.insert(2, (rng.uniform(-72, 72), rng.uniform(-72, 72)))
+        if dex % 10 == 0:
+            check()
+    check()
+    _report(
+        'spline bounds against a fresh spline',
+        **{
+            'edits': edits + crowded,
+            'checks': checks,
+            'seconds': time.perf_counter() - start,
+        },
+    )
+
+
+def bench_panel(widgets: int=150, frames: int=300) -> None:
+    import pygame as pg
+
+    from panel import Label, Button, Panel
+
+    pg.init()
+    screen = pg.display.set_mode((1200, 810))
+    font = pg.font.Font(None, 24)
+    rect = pg.Rect(810, 0, 390, 810)
+    items = set()
+    for dex in range(widgets):
+        pos = (rect.x + 10, 10 + dex * 30)
+        if dex % 2:
+            items.add(Button(
+                pos, text=f'Button {dex}', func=lambda: None, font=font,
+            ))
+        else:
+            items.add(Label(pos, text=f'Label {dex}', font=font))
+    panel = Panel(items, rect)
+    mouse = ((0, 0), (False, False, False))
+
+    def per_widget() -> None:
+        # what the panel did before compositing
+        for widget in items:
+            widget.update(*mouse)
+        for widget in items:
+            screen.blit(widget.surf, widget.pos)
+
+    def composited() -> None:
+        panel.update(*mouse)
+        panel.render(screen)
+
+    def unchanged() -> None:
+        # the app only redraws the panel when update says it changed
+        if panel.update(*mouse):
+            panel.render(screen)
+
+    def scrolled() -> None:
+        panel.scroll = -100 if panel.scroll == 0 else 0
+        panel.update(*mouse)
+        panel.render(screen)
+
+    _report(
+        f'panel, {widgets} widgets',
+        **{
+            'per widget (ms/frame)': _time(per_widget, frames),
+            'composited (ms/frame)': _time(composited, frames),
+            'unchanged (ms/frame)': _time(unchanged, frames),
+            'scrolling (ms/frame)': _time(scrolled, frames),
+        },
+    )
+
+
+def bench_input(chars: int=40, clicks: int=300) -> None:
+    import pygame as pg
+
+    from panel import Input, Panel
+
+    pg.init()
+    pg.display.set_mode((1200, 810))
+    font = pg.font.Font(None, 24)
+    field = Input((0, 0), 600, chars, font)
+    field.text = ''.join(
+        random.Random(0).choice('0123456789.-') for _ in range(chars)
+    )
+    panel = Panel({field}, (0, 0, 600, 40))
+    xs = [random.Random(1).uniform(0, 600) for _ in range(clicks)]
+
+    def scanned() -> None:
+        # the old search, measuring every prefix
+        for x in xs:
+            old = 0
+            for dex in range(len(field.text) + 1):
+                width = font.size(field.text[:dex])[0]
+                if old <= x < width:
+                    break
+                old = width
+
+    def bisected() -> None:
+        for x in xs:
+            field.handle_event(
+                pg.Event(pg.MOUSEBUTTONDOWN, pos=(x, 5), button=1),
+            )
+
+    def focused_frame() -> None:
+        panel.update((0, 0), (False, False, False))
+
+    _report(
+        f'input, {chars} chars',
+        **{
+            'prefix scan (ms/click)': _time(scanned, 1) / clicks,
+            'width table (ms/click)': _time(bisected, 1) / clicks,
+            'focused frame (ms)': _time(focused_frame, 1000),
+        },
+    )
+
+
+def bench_codegen(legs: tuple[int, ...]=(200, 2000), repeat: int=20) -> None:
+    from core import gen_data_path, templates, gen_code, Limits, leg_times
+
+    start_path = gen_data_path('code', 'start.txt')
+    leg_path = gen_data_path('code', 'leg.txt')
+    results = {}
+    for count in legs:
+        rng = random.Random(0)
+        poses = [
+            (round(rng.uniform(-72, 72), 2), round(rng.uniform(-72, 72), 2),
+             round(rng.uniform(-180, 180), 2))
+            for _ in range(count + 1)
+        ]
+
+        def concatenated() -> None:
+            # the old _copy_code, reading the files on every click
+            with open(start_path) as file:
+                code = file.read().format(*poses[0])
+            with open(leg_path) as file:
+                leg = file.read()
+            for dex, pose in enumerate(poses[1:]):
+                code += leg.format(*pose, dex, timeouts[dex])
+
+        timeouts = [time + 1 for time in leg_times(poses, Limits())]
+
+        def cached() -> None:
+            gen_code(
+                templates.get(start_path), templates.get(leg_path), poses,
+                timeouts,
+            )
+
+        results[f'{count} legs, += (ms)'] = _time(concatenated, repeat)
+        results[f'{count} legs, cached (ms)'] = _time(cached, repeat)
+    _report('code generation', **results)
+
+
+def bench_leg_times(edits: int=2000) -> None:
+    # leg times patched per edit against leg_times() of the whole path,
+    # with turns in place, simplifies and limits changing along the way
+    import math
+
+    from core import PathEditor, Limits, leg_times
+
+    editor = PathEditor((144, 144), (810, 810))
+    rng = random.Random(0)
+    limits = Limits()
+    checks = 0
+    start = time.perf_counter()
+    for _ in range(edits):
+        roll = rng.random()
+        if roll < 0.1 and len(editor.path):
+            dex = rng.randrange(len(editor.path))
+            pose = editor.path[dex].pose
+            editor.move(dex, (*pose[:2], rng.uniform(-180, 180)))
+            editor.commit()
+        elif roll < 0.13:
+            editor.simplify(3)
+            editor.commit()
+        elif roll < 0.15:
+            limits = Limits(rng.uniform(10, 80), rng.uniform(10, 80),
+                            rng.uniform(90, 360))
+        else:
+            _random_edit(editor, rng)
+        if rng.random() < 0.3:
+            expected = leg_times(editor.path.poses(), limits)
+            if (editor.leg_times(limits) != expected
+                    or not math.isclose(editor.total_time(limits),
+                                        sum(expected), abs_tol=1e-6)):
+                raise AssertionError('leg times out of date')
+            checks += 1
+    _report(
+        'leg times against leg_times()',
+        **{
+            'edits': edits,
+            'checks': checks,
+            'seconds': time.perf_counter() - start,
+        },
+    )
+
+
+def bench_import(repeat: int=5) -> None:
+    # fresh interpreters, so nothing is already imported
+    code = (
+        'import sys, time\n'
+        'start = time.perf_counter()\n'
+        'import {}\n'
+        'print(time.perf_counter() - start, "pygame" in sys.modules)\n'
+    )
+    results = {}
+    for module in ('core', 'main'):
+        times = []
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, '-c', code.format(module)],
+                capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+            ).stdout.split()
+            times.append(float(output[-2]) * 1000)
+            pygame_loaded = output[-1] == 'True'
+        results[f'{module} (ms)'] = min(times)
+        results[f'{module} loads pygame'] = str(pygame_loaded)
+    _report('import time', **results)
+    if results['core loads pygame'] != 'False':
+        raise AssertionError('core imported pygame')
+
+
+def bench_pathfile(sizes: tuple[int, ...]=(1_000, 10_000, 100_000)) -> None:
+    import pathfile
+    from path import Path
+
+    with tempfile.TemporaryDirectory() as directory:
+        text = os.path.join(directory, 'path.txt')
+        binary = os.path.join(directory, 'path.bin')
+        # empty paths round-trip, empty files are not paths
+        for binary_file in (False, True):
+            pathfile.save(Path(), text, binary=binary_file)
+            if len(pathfile.load(text)):
+                raise AssertionError('empty path did not round-trip')
+            if not pathfile.is_path_file(text):
+                raise AssertionError('saved path not told from a log')
+        open(text, 'w').close()
+        if pathfile.is_path_file(text):
+            raise AssertionError('empty file told apart as a path')
+        try:
+            pathfile.load(text)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('empty file loaded as a path')
+        for size in sizes:
+            rng = random.Random(0)
+            path = Path(
+                (rng.uniform(-72, 72), rng.uniform(-72, 72),
+                 rng.uniform(-180, 180))
+                for _ in range(size)
+            )
+            repeat = max(1, 100_000 // size)
+
+            def view() -> None:
+                with pathfile.PathFileView(binary) as opened:
+                    opened[len(opened) // 2]
+
+            _report(
+                f'path files, {size} points',
+                **{
+                    'save text (ms)': _time(
+                        lambda: pathfile.save(path, text), repeat,
+                    ),
+                    'load text (ms)': _time(
+                        lambda: pathfile.load(text), repeat,
+                    ),
+                    'save binary (ms)': _time(
+                        lambda: pathfile.save(path, binary, binary=True),
+                        repeat,
+                    ),
+                    'load binary (ms)': _time(
+                        lambda: pathfile.load(binary), repeat,
+                    ),
+                    'mmap view (ms)': _time(view, repeat),
+                    'text size (kB)': os.path.getsize(text) / 1000,
+                    'binary size (kB)': os.path.getsize(binary) / 1000,
+                },
+            )
+
+
+def _recorded_path(points: int, seed: int=0):
+    # like odometry logged while driving: a smooth wander with sensor noise,
+    # 0.05 inches between readings
+    import math
+
+    from path import Path
+
+    rng = random.Random(seed)
+    x = y = heading = direction = 0
+    poses = []
+    for _ in range(points):
+        direction += rng.uniform(-0.02, 0.02)
+        heading += rng.uniform(-0.1, 0.1)
+        x += math.cos(direction) * 0.05
+        y += math.sin(direction) * 0.05
+        poses.append(
+            (x + rng.gauss(0, 0.05), y + rng.gauss(0, 0.05), heading),
+        )
+    return Path(poses)
+
+
+def _noisy_path(points: int, seed: int=0):
+    # a random walk, nearly every point of which simplify has to keep:
+    # steps of about 0.3 inches and 2 degrees in random directions
+    from path import Path
+
+    rng = random.Random(seed)
+    x = y = heading = 0
+    poses = []
+    for _ in range(points):
+        x += rng.gauss(0, 0.3)
+        y += rng.gauss(0, 0.3)
+        heading += rng.gauss(0, 2)
+        poses.append((x, y, heading))
+    return Path(poses)
+
+
+def bench_simplify(sizes: tuple[int, ...]=(1_000, 10_000, 100_000),
+                   tolerance: float=0.5,
+                   heading_tolerance: float=5) -> None:
+    from simplify import simplify
+
+    for name, make in (('recorded', _recorded_path), ('noisy', _noisy_path)):
+        for size in sizes:
+            path = make(size)
+            repeat = max(1, 10_000 // size)
+            kept = simplify(
+                path.xs, path.ys, path.headings, tolerance, heading_tolerance,
+            )
+            _report(
+                f'simplify, {size} {name} points',
+                **{
+                    'simplify (ms)': _time(
+                        lambda: simplify(
+                            path.xs, path.ys, path.headings,
+                            tolerance, heading_tolerance,
+                        ),
+                        repeat,
+                    ),
+                    'points kept': len(kept),
+                },
+            )
+
+
+def _field_route(points: int, length: float=1500, seed: int=0):
+    # one long wandering route that bounces off the field walls, split into
+    # points; the more points, the closer together they are
+    import math
+
+    from path import Path
+
+    rng = random.Random(seed)
+    step = length / points
+    x = y = heading = direction = 0
+    poses = []
+    for _ in range(points):
+        direction += rng.gauss(0, 0.3 * math.sqrt(step))
+        heading += rng.gauss(0, step)
+        x += math.cos(direction) * step
+        y += math.sin(direction) * step
+        if abs(x) > 66:
+            x = math.copysign(66, x)
+            direction = math.pi - direction
+        if abs(y) > 66:
+            y = math.copysign(66, y)
+            direction = -direction
+        poses.append((x, y, heading))
+    return Path(poses)
+
+
+def bench_detail(sizes: tuple[int, ...]=(1_000, 10_000, 100_000),
+                 frames: int=10) -> None:
+    import pygame as pg
+
+    for size in sizes:
+        game = _make_game(0)
+        game._view.assign(_field_route(size))
+        game._finish_change()
+        game._update_points_list()
+        game._step(0)
+
+        def redraw() -> None:
+            game._mark_path_dirty()
+            game._step(0, [])
+
+        def drag() -> None:
+            drag.frame += 1
+            game._step(0, [pg.Event(
+                pg.MOUSEMOTION,
+                pos=(0, 0),
+                rel=(1 if drag.frame % 20 < 10 else -1, 0),
+                buttons=(1, 0, 0),
+            )])
+
+        drag.frame = 0
+        results = {'full redraw (ms/frame)': _time(redraw, frames)}
+        game._clicking = game._selected = size // 2
+        results['dragging (ms/frame)'] = _time(drag, frames)
+        points = game._view.points
+        box = game._screen.get_rect()
+        box = (box.left, box.top, box.right, box.bottom)
+        results['line points'] = sum(
+            len(line) for line in game._view.detail.lines(points, False, *box)
+        )
+        for level, name in enumerate(('markers', 'footprints', 'labels')):
+            results[name] = len(game._view.detail.thinned(points, level, *box))
+        _report(f'drawing a {size} point route', **results)
+
+
+def bench_detail_edits(paths: int=20,
+                       edits: int=200,
+                       steps: tuple[int, ...]=(8, 16, 48)) -> None:
+    # the level of detail patched per edit against thinning the points
+    # from scratch and a fresh Detail's line, straight and curved, with
+    # moves of a few inches so points change cells
+    from core import PathEditor
+    from detail import Detail, thin
+
+    rng = random.Random(0)
+    checks = 0
+    start = time.perf_counter()
+    for trial in range(paths):
+        editor = PathEditor((144, 144), (810, 810))
+        view = editor.view
+        for dex in range(rng.randint(0, 60)):
+            editor.insert(dex, (rng.uniform(-70, 70), rng.uniform(-70, 70)))
+        editor.commit()
+        view.detail.set_steps(steps)
+        curve = trial % 2 == 1
+        for _ in range(edits):
+            if rng.random() < 0.4 and len(editor.path):
+                dex = rng.randrange(len(editor.path))
+                x, y, heading = editor.path[dex].pose
+                editor.move(dex, (x + rng.uniform(-3, 3),
+                                  y + rng.uniform(-3, 3), heading))
+                editor.commit()
+            else:
+                _random_edit(editor, rng)
+            if rng.random() > 0.3:
+                continue
+            points = view.points
+            left, top = rng.uniform(0, 800), rng.uniform(0, 800)
+            box = (
+                left, top,
+                left + rng.uniform(5, 200), top + rng.uniform(5, 200),
+            )
+            firsts = thin(points, steps[0])
+            for level, step in enumerate(steps):
+                if level:
+                    firsts = thin(points, step, firsts.values())
+                expected = sorted(
+                    dex for dex in firsts.values()
+                    if box[0] <= points[dex][0] <= box[2]
+                    and box[1] <= points[dex][1] <= box[3]
+                )
+                if view.detail.thinned(points, level, *box) != expected:
+                    raise AssertionError('thinned points out of date')
+            fresh = Detail(view.grid, view.spline)
+            fresh.reset(len(points))
+            whole = (-100, -100, 1000, 1000)
+            line = view.detail.lines(points, curve, *whole)
+            if line != fresh.lines(points, curve, *whole):
+                raise AssertionError('line out of date')
+            # every run drawn for the box is a piece of the whole line
+            for run in view.detail.lines(points, curve, *box):
+                if not any(
+                    line[0][at:at + len(run)] == run
+                    for at, pos in enumerate(line[0]) if pos == run[0]
+                ):
+                    raise AssertionError('run not on the line')
+            checks += 1
+    _report(
+        'level of detail against a fresh one',
+        **{
+            'edits': paths * edits,
+            'checks': checks,
+            'seconds': time.perf_counter() - start,
+        },
+    )
+
+
+def bench_odometry(samples: int=1_000_000) -> None:
+    import math
+
+    import pygame as pg
+
+    import odometry
+
+    # laps of a circle logged at 500 Hz, pausing every few seconds
+    times, xs, ys, headings = [], [], [], []
+    angle = 0
+    for dex in range(samples):
+        if (dex // 2000) % 3:
+            angle += 0.0004
+        times.append(dex * 0.002)
+        xs.append(48 * math.cos(angle))
+        ys.append(48 * math.sin(angle))
+        headings.append((math.degrees(angle) + 270) % 360 - 180)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv = os.path.join(directory, 'log.csv')
+        binary = os.path.join(directory, 'log.bin')
+        with open(csv, 'w') as file:
+            file.write('time,x,y,heading\n')
+            file.writelines(
+                f'{time},{x},{y},{heading}\n'
+                for time, x, y, heading in zip(times, xs, ys, headings)
+            )
+        with open(binary, 'wb') as file:
+            odometry.write_binary(file, times, xs, ys, headings)
+        del times, xs, ys, headings
+
+        for name, filename in (('csv', csv), ('binary', binary)):
+            game = _make_game()
+            game._step(0)
+            game._import_log(filename)
+            frames = []
+            start = time.perf_counter()
+            while game._log_import is not None:
+                frame = time.perf_counter()
+                game._step(1 / 60, [])
+                frames.append(time.perf_counter() - frame)
+            seconds = time.perf_counter() - start
+            game._visualize()
+            _report(
+                f'importing a {name} log, {samples} samples',
+                **{
+                    'import (s)': seconds,
+                    'mean frame (ms)': sum(frames) / len(frames) * 1000,
+                    'slowest frame (ms)': max(frames) * 1000,
+                    'samples kept': len(game._track),
+                    'replay (ms/frame)': _time(
+                        lambda: game._step(1 / 60, []), 120,
+                    ),
+                },
+            )
+
+
+def bench_autosave(points: int=100_000,
+                   frames: int=120,
+                   edit_every: int=10) -> None:
+    import pathfile
+
+    game = _make_game(points)
+    game._step(0)
+    rng = random.Random(0)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'autosave.path')
+        game._settings['autosave_file'] = filename
+        game._settings['autosave_delay'] = 0.02
+
+        for mode in ('off', 'background', 'synchronous'):
+            game._settings['autosave'] = mode == 'background'
+            times = []
+            edits = []
+            for frame in range(frames):
+                start = time.perf_counter()
+                if frame % edit_every == 0:
+                    dex = rng.randrange(len(game._path))
+                    pose = game._path[dex].pose
+                    game._editor.move(dex, (*pose[:2], pose[2] + 1))
+                    game._finish_change()
+                    if mode == 'synchronous': # saving in the frame loop
+                        pathfile.save(game._path, filename, binary=True)
+                game._step(0)
+                work = time.perf_counter() - start
+                times.append(work * 1000)
+                if frame % edit_every == 0:
+                    edits.append(work * 1000)
+                # paced like clock.tick, which is when the saver gets to run
+                time.sleep(max(1 / 60 - work, 0))
+            times.sort()
+            results[mode + ' mean (ms/frame)'] = sum(times) / frames
+            results[mode + ' p95 (ms/frame)'] = times[int(frames * 0.95)]
+            results[mode + ' edit frames (ms)'] = sum(edits) / len(edits)
+            if mode == 'background':
+                # checked before synchronous mode writes the same file
+                game._autosaver.close()
+                results['background saves'] = game._autosaver.saves
+                game._autosaver = None
+                if pathfile.load(filename) != game._path:
+                    raise AssertionError('autosave does not match the path')
+    _report(
+        f'editing with autosave, {points} points, '
+        f'an edit every {edit_every} frames',
+        **results,
+    )
+    # an edit frame may pay for copying the path, not for writing it
+    off = results['off edit frames (ms)']
+    if (results['background edit frames (ms)'] - off
+            > (results['synchronous edit frames (ms)'] - off) / 2):
+        raise AssertionError('autosave stalled the frame loop')
+
+
+BENCHMARKS = [
+    bench_idle_frames,
+    bench_damage,
+    bench_footprints,
+    bench_visualizer,
+    bench_trajectory,
+    bench_idle_cpu,
+    bench_hit_tests,
+    bench_drag,
+    bench_spline,
+    bench_spline_bounds,
+    bench_panel,
+    bench_input,
+    bench_codegen,
+    bench_leg_times,
+    bench_import,
+    bench_pathfile,
+    bench_simplify,
+    bench_detail,
+    bench_detail_edits,
+    bench_odometry,
+    bench_autosave,
+]
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:]
+    for bench in BENCHMARKS:
+        if not names or bench.__name__ in names:
+            bench()
@@ -0,0 +1,80 @@
+import os
+import itertools
+from string import Formatter
+from numbers import Real
+from typing import Self
+from typing import Iterable
+
+
+Pose = tuple[Real, Real, Real]
+
+
+# A str.format template parsed once. Fields are positional like the files
+# in data/code use them ({} or {0}), checked when the template is loaded so
+# a broken file fails there instead of halfway through a path.
+class Template(object):
+    def __init__(self: Self, text: str) -> None:
+        self.text = text
+        self.fields = 0
+        auto = 0
+        for _, name, _, _ in Formatter().parse(text):
+            if name is None:
+                continue
+            if name == '':
+                auto += 1
+                self.fields = max(self.fields, auto)
+            elif name.isdigit():
+                self.fields = max(self.fields, int(name) + 1)
+            else:
+                raise ValueError(f'template field {name!r} is not positional')
+        self._format = text.format
+
+    def render(self: Self, *args: object) -> str:
+        return self._format(*args)
+
+    def render_all(self: Self, rows: Iterable[tuple]) -> str:
+        # one string for every row, joined once at the end
+        return ''.join(itertools.starmap(self._format, rows))
+
+
+# Templates by path, loaded on first use and again whenever the file's
+# modification time or size changes, so edits show up without a restart.
+class TemplateCache(object):
+    def __init__(self: Self) -> None:
+        self._templates = {} # path -> (stamp, Template)
+
+    def __len__(self: Self) -> int:
+        return len(self._templates)
+
+    def clear(self: Self) -> None:
+        self._templates.clear()
+
+    def get(self: Self, path: str) -> Template:
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._templates.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(path) as file:
+            template = Template(file.read())
+        self._templates[path] = (stamp, template)
+        return template
+
+
+templates = TemplateCache()
+
+
+def gen_code(start: Template,
+             leg: Template,
+             poses: Iterable[Pose],
+             timeouts: Iterable[Real]) -> str:
+    # start is filled with the first pose, leg with each later pose, its
+    # leg number and its timeout in seconds
+    poses = iter(poses)
+    first = next(poses, None)
+    if first is None:
+        return ''
+    return start.render(*first) + leg.render_all(
+        (*pose, dex, timeout)
+        for dex, (pose, timeout) in enumerate(zip(poses, timeouts))
+    )
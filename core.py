@@ -0,0 +1,364 @@
+import os
+import sys
+import math
+from array import array
+from bisect import bisect_right
+from numbers import Real
+from typing import Self
+from typing import Optional
+from typing import Sequence
+
+from path import Path
+from path import Waypoint
+from history import History
+from history import Insert
+from history import Delete
+from history import Move
+from history import Flip
+from history import Replace
+from spatial import SpatialGrid
+from spline import Spline
+from spline import Segment
+from codegen import Template
+from codegen import templates
+from codegen import gen_code
+from motion import Limits
+from motion import leg_times
+from motion import LegTimes
+from simplify import simplify
+from detail import Detail
+
+
+# Everything about a path that does not need a window: the model, undo
+# history, field/screen transforms and code generation. Nothing here may
+# import pygame, so scripts and batch tools can load it quickly.
+
+Pos = Sequence[Real]
+
+
+def gen_data_path(*args: str):
+    if getattr(sys, "frozen", False):
+        directory = sys.prefix
+    else:
+        # next to the sources, wherever they are run from
+        directory = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(directory, 'data', *args)
+
+
+# The path as it is drawn: screen positions, the hit-test grid, the curve
+# through the points, the rows of the points list and the time of every
+# leg. Each edit patches them in place, and it has the editing interface
+# of Path so history commands can be applied through it.
+class ScreenPath(object):
+    def __init__(self: Self,
+                 path: Path,
+                 scale: tuple[Real, Real],
+                 offset: tuple[Real, Real],
+                 precision: int) -> None:
+        self.path = path
+        self._scale = scale
+        self._offset = offset
+        self._precision = precision
+        self._points = []
+        self._rows = []
+        self._version = 0
+        self.grid = SpatialGrid()
+        self.spline = Spline(grid=self.grid)
+        self.legs = LegTimes()
+        self.detail = Detail(self.grid, self.spline)
+        self.grid.rebuild(self.points)
+
+    def _sync(self: Self) -> None:
+        # derived from the path in one pass when it is stale
+        if self._version != self.path.version:
+            self._points = self.path.transformed(self._scale, self._offset)
+            self._rows = [self._row(*pose) for pose in self.path.poses()]
+            self._version = self.path.version
+            self.spline.reset(len(self._points))
+            self.legs.reset()
+            self.detail.reset(len(self._points))
+
+    @property
+    def points(self: Self) -> list[tuple[float, float]]:
+        self._sync()
+        return self._points
+
+    @property
+    def rows(self: Self) -> list[str]:
+        # lines of the points list
+        self._sync()
+        return self._rows
+
+    def _row(self: Self, x: Real, y: Real, heading: Real) -> str:
+        return (
+            f'[{round(x, self._precision)}, '
+            f'{round(y, self._precision)}, '
+            f'{round(heading, self._precision)}]'
+        )
+
+    def leg_times(self: Self, limits: Limits) -> list[float]:
+        self._sync()
+        return self.legs.times(self.path, limits)
+
+    def total_time(self: Self, limits: Limits) -> float:
+        self._sync()
+        return self.legs.total(self.path, limits)
+
+    def to_screen(self: Self, pos: Pos) -> tuple[float, float]:
+        return (
+            pos[0] * self._scale[0] + self._offset[0],
+            pos[1] * self._scale[1] + self._offset[1],
+        )
+
+    def insert(self: Self,
+               dex: int,
+               x: Real,
+               y: Real,
+               heading: Real=0) -> None:
+        self._sync()
+        self.path.insert(dex, x, y, heading)
+        pos = self.to_screen((x, y))
+        self._points.insert(dex, pos)
+        self._rows.insert(dex, self._row(x, y, heading))
+        self._version = self.path.version
+        self.grid.insert(dex, pos)
+        self.spline.insert(dex, len(self._points))
+        self.legs.insert(self.path, dex)
+        self.detail.insert(self._points, dex)
+
+    def delete(self: Self, dex: int) -> None:
+        self._sync()
+        self.path.delete(dex)
+        old = self._points.pop(dex)
+        del self._rows[dex]
+        self._version = self.path.version
+        self.grid.delete(dex)
+        self.spline.delete(dex, len(self._points))
+        self.legs.delete(self.path, dex)
+        self.detail.delete(self._points, dex, old)
+
+    def set_pose(self: Self,
+                 dex: int,
+                 x: Real,
+                 y: Real,
+                 heading: Real) -> None:
+        self._sync()
+        self.path.set_pose(dex, x, y, heading)
+        pos = self.to_screen((x, y))
+        old = self._points[dex]
+        if pos != old:
+            self._points[dex] = pos
+            self.grid.move(dex, pos)
+            self.spline.move(dex)
+            self.detail.move(self._points, dex, old)
+        self.legs.move(self.path, dex)
+        self._rows[dex] = self._row(x, y, heading)
+        self._version = self.path.version
+
+    def flip(self: Self) -> None:
+        self.path.flip()
+        self.grid.rebuild(self.points)
+
+    def assign(self: Self, path: Path) -> None:
+        self.path.assign(path)
+        self.grid.rebuild(self.points)
+
+
+# Playback of a path, built once when it starts. Time is measured in
+# distance along the path, so playing at another speed only changes how
+# fast it advances. Every leg is sampled samples times (eased with
+# smoothstep when smooth, like the leg-by-leg visualizer was) into one
+# table that pose_at() bisects, so any time costs the same to look up.
+# Legs between coincident points take no time. With curves, one Segment per
+# leg, the legs follow their samples instead, placed by arc length.
+class Trajectory(object):
+    def __init__(self: Self,
+                 points: Sequence[Pos],
+                 headings: Sequence[Real],
+                 smooth: bool=True,
+                 samples: int=16,
+                 curves: Optional[Sequence[Segment]]=None) -> None:
+        if not points:
+            raise ValueError('trajectory needs at least one point')
+        self.lengths = [0.0] # distance along the path at each waypoint
+        for dex in range(1, len(points)):
+            self.lengths.append(self.lengths[-1] + (
+                math.dist(points[dex - 1], points[dex]) if curves is None
+                else curves[dex - 1].length
+            ))
+        self.duration = self.lengths[-1]
+
+        self._times = array('d')
+        self._xs = array('d')
+        self._ys = array('d')
+        self._headings = array('d')
+        for leg in range(len(points) - 1):
+            (x1, y1), (x2, y2) = points[leg], points[leg + 1]
+            heading1, heading2 = headings[leg], headings[leg + 1]
+            start, end = self.lengths[leg], self.lengths[leg + 1]
+            if curves is not None:
+                self._add_curve(curves[leg], start, end,
+                                heading1, heading2, smooth)
+                continue
+            for sample in range(samples):
+                t = sample / samples
+                eased = t * t * (3 - 2 * t) if smooth else t
+                self._times.append(start + (end - start) * t)
+                self._xs.append(x1 + (x2 - x1) * eased)
+                self._ys.append(y1 + (y2 - y1) * eased)
+                self._headings.append(
+                    heading1 + (heading2 - heading1) * eased,
+                )
+        self._times.append(self.duration)
+        self._xs.append(points[-1][0])
+        self._ys.append(points[-1][1])
+        self._headings.append(headings[len(points) - 1])
+
+    def _add_curve(self: Self,
+                   curve: Segment,
+                   start: Real,
+                   end: Real,
+                   heading1: Real,
+                   heading2: Real,
+                   smooth: bool) -> None:
+        for dex in range(len(curve.points) - 1):
+            done = curve.lengths[dex] / curve.length if curve.length else 0
+            # when smoothstep of t is done, undone in closed form
+            t = 0.5 - math.sin(math.asin(1 - 2 * done) / 3) if smooth else done
+            self._times.append(start + (end - start) * t)
+            self._xs.append(curve.points[dex][0])
+            self._ys.append(curve.points[dex][1])
+            self._headings.append(heading1 + (heading2 - heading1) * done)
+
+    def pose_at(self: Self, time: Real) -> tuple[float, float, float]:
+        dex = bisect_right(self._times, time) # first sample after time
+        if dex == 0:
+            return (self._xs[0], self._ys[0], self._headings[0])
+        if dex == len(self._times):
+            return (self._xs[-1], self._ys[-1], self._headings[-1])
+        start, end = self._times[dex - 1], self._times[dex]
+        t = (time - start) / (end - start) # end > start, bisect skipped ties
+        return (
+            self._xs[dex - 1] + (self._xs[dex] - self._xs[dex - 1]) * t,
+            self._ys[dex - 1] + (self._ys[dex] - self._ys[dex - 1]) * t,
+            self._headings[dex - 1]
+            + (self._headings[dex] - self._headings[dex - 1]) * t,
+        )
+
+
+# A path being edited on a field drawn image_size pixels wide and high,
+# with its screen view and undo history. Edits are recorded with do() and
+# grouped into one undo step by commit(). Positions are rounded to
+# precision decimals, which is what the app shows.
+class PathEditor(object):
+    def __init__(self: Self,
+                 field_size: tuple[Real, Real],
+                 image_size: tuple[Real, Real],
+                 precision: int=2,
+                 history_steps: Optional[int]=1000,
+                 history_bytes: Optional[int]=64_000_000) -> None:
+        self.field_size = field_size
+        self.image_size = image_size
+        self.precision = precision
+        self.path = Path()
+        self.view = ScreenPath(
+            self.path,
+            (image_size[0] / field_size[0], -image_size[1] / field_size[1]),
+            (image_size[0] / 2, image_size[1] / 2),
+            precision,
+        )
+        self.history = History(max_steps=history_steps,
+                               max_bytes=history_bytes)
+        self._code = (None, '') # (path version, templates and limits, code)
+
+    def to_field(self: Self, screen_pos: Pos) -> tuple[float, float]:
+        return (
+            (screen_pos[0] - self.image_size[0] / 2)
+            / self.image_size[0]
+            * self.field_size[1],
+            -(screen_pos[1] - self.image_size[1] / 2)
+            / self.image_size[1]
+            * self.field_size[1],
+        )
+
+    def to_screen(self: Self, field_pos: Pos) -> tuple[float, float]:
+        return self.view.to_screen(field_pos)
+
+    def round_pos(self: Self, pos: Pos) -> tuple[float, float]:
+        return (round(pos[0], self.precision), round(pos[1], self.precision))
+
+    def do(self: Self, command) -> None:
+        self.history.do(command, self.view)
+
+    def commit(self: Self) -> bool:
+        return self.history.commit()
+
+    def undo(self: Self) -> bool:
+        return self.history.undo(self.view)
+
+    def redo(self: Self) -> bool:
+        return self.history.redo(self.view)
+
+    def insert(self: Self, dex: int, pos: Pos, heading: Real=0) -> None:
+        self.do(Insert(dex, (pos[0], pos[1], heading)))
+
+    def delete(self: Self, dex: int) -> None:
+        self.do(Delete(dex, self.path[dex].pose))
+
+    def move(self: Self, dex: int, pose: tuple[Real, Real, Real]) -> None:
+        self.do(Move(dex, self.path[dex].pose, pose))
+
+    def flip(self: Self) -> None:
+        self.do(Flip())
+
+    def clear(self: Self) -> None:
+        self.do(Replace(self.path, Path()))
+
+    def replace(self: Self, path: Path) -> None:
+        # the whole path, like a loaded file, as one edit
+        self.do(Replace(self.path, path))
+
+    def simplify(self: Self,
+                 tolerance: Real,
+                 heading_tolerance: Real=math.inf,
+                 start: int=0,
+                 end: Optional[int]=None) -> int:
+        # drops the points from start to end (exclusive) that the path can
+        # do without, as one edit; returns how many were dropped
+        if end is None:
+            end = len(self.path)
+        xs, ys, headings = self.path.xs, self.path.ys, self.path.headings
+        kept = simplify(
+            xs, ys, headings, tolerance, heading_tolerance, start, end,
+        )
+        removed = end - start - len(kept)
+        if removed:
+            kept = [*range(start), *kept, *range(end, len(self.path))]
+            self.do(Replace(self.path, Path.from_columns(
+                array('d', [xs[dex] for dex in kept]),
+                array('d', [ys[dex] for dex in kept]),
+                array('d', [headings[dex] for dex in kept]),
+            )))
+        return removed
+
+    def leg_times(self: Self, limits: Limits) -> list[float]:
+        # estimated seconds per leg, patched as the path is edited
+        return self.view.leg_times(limits)
+
+    def total_time(self: Self, limits: Limits) -> float:
+        return self.view.total_time(limits)
+
+    def code(self: Self,
+             start: Template,
+             leg: Template,
+             limits: Limits,
+             margin: Real=1.0) -> str:
+        # each leg times out margin seconds after its estimated time;
+        # generating again without edits reuses the last code
+        key = (self.path.version, start, leg, limits, margin)
+        if self._code[0] != key:
+            timeouts = [time + margin for time in self.leg_times(limits)]
+            self._code = (
+                key, gen_code(start, leg, self.path.poses(), timeouts),
+            )
+        return self._code[1]
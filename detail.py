@@ -0,0 +1,288 @@
+import itertools
+from numbers import Real
+from typing import Self
+from typing import Sequence
+
+from spatial import SpatialGrid
+from spline import Spline
+
+
+Pos = Sequence[Real]
+
+Cell = tuple[float, float]
+
+
+def cell_bounds(pos: Pos, step: Real) -> tuple[float, float, float, float]:
+    # (left, top, right, bottom) of the cell pos is in
+    left, top = pos[0] // step * step, pos[1] // step * step
+    return (left, top, left + step, top + step)
+
+
+def thin(points: Sequence[Pos],
+         step: Real,
+         among: Sequence[int]=None) -> dict[Cell, int]:
+    # the first point in every cell, so points drawn on top of each other
+    # are drawn once. Thinning what a step this one is a multiple of kept
+    # (among) gives the same points quicker, as the first point of a cell
+    # is also first in its part of the cell.
+    first = {}
+    if among is None:
+        for dex, (x, y) in enumerate(points):
+            first.setdefault((x // step, y // step), dex)
+    else:
+        for dex in among:
+            x, y = points[dex]
+            first.setdefault((x // step, y // step), dex)
+    return first
+
+
+# Level of detail for drawing long paths on the screen. Points are put in
+# cells of a grid step pixels wide.
+#
+# The line skips the vertices in the same cell as the one before them, so
+# it is never more than a cell's diagonal off. What each segment keeps only
+# depends on its own samples, so it is kept per segment (a piece) and an
+# edit only invalidates the pieces the spline invalidates.
+#
+# Markers, footprints and labels are drawn for the first point of every
+# cell of the sizes given to set_steps(), which have to be multiples of
+# the first. A point moving only changes the first point of the cells it
+# left and entered, which are looked up again in the grid.
+#
+# Like Spline, it is patched by ScreenPath as the path is edited and the
+# points are passed in on every call. When more than one in crowded of the
+# segments are near a box, the whole line is drawn instead of looking them
+# up in the grid.
+class Detail(object):
+    def __init__(self: Self,
+                 grid: SpatialGrid,
+                 spline: Spline,
+                 step: Real=1,
+                 crowded: int=4) -> None:
+        self.step = step
+        self.crowded = crowded
+        self._grid = grid
+        self._spline = spline
+        self._curve = False
+        self._pieces = []
+        self._whole = None # the whole line, until a piece changes
+        self._steps = ()
+        self._firsts = None # per step, the first point of every cell
+
+    def _invalidate(self: Self, first: int, last: int) -> None:
+        self._whole = None
+        for dex in range(max(first, 0), min(last + 1, len(self._pieces))):
+            self._pieces[dex] = None
+
+    def _cell(self: Self, pos: Pos, step: Real) -> Cell:
+        return (pos[0] // step, pos[1] // step)
+
+    def _look_up(self: Self, firsts: dict, cell: Cell, step: Real) -> None:
+        dex = self._grid.first(
+            cell[0] * step, cell[1] * step,
+            (cell[0] + 1) * step, (cell[1] + 1) * step,
+        )
+        if dex == -1:
+            firsts.pop(cell, None)
+        else:
+            firsts[cell] = dex
+
+    def reset(self: Self, count: int) -> None:
+        self._pieces = [None] * max(count - 1, 0)
+        self._whole = None
+        self._firsts = None
+
+    def set_steps(self: Self, steps: tuple[Real, ...]) -> None:
+        if steps != self._steps:
+            self._steps = steps
+            self._firsts = None
+
+    def insert(self: Self, points: Sequence[Pos], dex: int) -> None:
+        # point dex was inserted into points
+        if len(points) < 2:
+            self._pieces = []
+        else:
+            self._pieces.insert(min(max(dex - 1, 0), len(self._pieces)), None)
+        self._invalidate(dex - 2, dex + 1)
+        if self._firsts is None:
+            return None
+        for level, step in enumerate(self._steps):
+            firsts = {
+                cell: first + (first >= dex)
+                for cell, first in self._firsts[level].items()
+            }
+            cell = self._cell(points[dex], step)
+            firsts[cell] = min(firsts.get(cell, dex), dex)
+            self._firsts[level] = firsts
+
+    def delete(self: Self, points: Sequence[Pos], dex: int, pos: Pos) -> None:
+        # point dex, which was at pos, was deleted from points
+        if len(points) < 2:
+            self._pieces = []
+        else:
+            del self._pieces[min(max(dex - 1, 0), len(self._pieces) - 1)]
+        self._invalidate(dex - 2, dex)
+        if self._firsts is None:
+            return None
+        for level, step in enumerate(self._steps):
+            firsts = {
+                cell: first - (first > dex)
+                for cell, first in self._firsts[level].items()
+            }
+            cell = self._cell(pos, step)
+            if firsts.get(cell) == dex:
+                self._look_up(firsts, cell, step)
+            self._firsts[level] = firsts
+
+    def move(self: Self, points: Sequence[Pos], dex: int, old: Pos) -> None:
+        # point dex moved from old
+        self._invalidate(dex - 2, dex + 1)
+        if self._firsts is None:
+            return None
+        for firsts, step in zip(self._firsts, self._steps):
+            left = self._cell(old, step)
+            entered = self._cell(points[dex], step)
+            if left == entered:
+                continue
+            if firsts.get(entered, dex) >= dex:
+                firsts[entered] = dex
+            if firsts.get(left) == dex:
+                self._look_up(firsts, left, step)
+
+    def _piece(self: Self, points: Sequence[Pos], dex: int) -> tuple:
+        # the vertices of segment dex that the line keeps, after its start
+        piece = self._pieces[dex]
+        if piece is None:
+            step = self.step
+            if self._curve:
+                samples = self._spline.segment(points, dex).points
+            else:
+                samples = points[dex:dex + 2]
+            piece = tuple(
+                pos for last, pos in zip(samples, samples[1:])
+                if (pos[0] // step, pos[1] // step)
+                != (last[0] // step, last[1] // step)
+            )
+            self._pieces[dex] = piece
+        return piece
+
+    def _fill(self: Self, points: Sequence[Pos]) -> None:
+        # every piece at once, quicker than one by one for straight lines
+        if self._curve:
+            for dex, piece in enumerate(self._pieces):
+                if piece is None:
+                    self._piece(points, dex)
+            return None
+        step = self.step
+        cells = [(x // step, y // step) for x, y in points]
+        self._pieces = [
+            (pos,) if here != last else ()
+            for pos, here, last in zip(points[1:], cells[1:], cells)
+        ]
+
+    def _before(self: Self, points: Sequence[Pos], dex: int) -> Pos:
+        # the last vertex kept before segment dex
+        for before in range(dex - 1, -1, -1):
+            piece = self._piece(points, before)
+            if piece:
+                return piece[-1]
+        return points[0]
+
+    def _after(self: Self, points: Sequence[Pos], dex: int) -> Pos:
+        # the first vertex kept after segment dex, the last point if none
+        for after in range(dex + 1, len(self._pieces)):
+            piece = self._piece(points, after)
+            if piece:
+                return piece[0]
+        return points[-1]
+
+    def lines(self: Self,
+              points: Sequence[Pos],
+              curve: bool,
+              left: Real,
+              top: Real,
+              right: Real,
+              bottom: Real) -> list[list[Pos]]:
+        # runs of the line that can cross the box, each with the vertex
+        # before and after it, so any box draws the same line in it
+        if curve != self._curve:
+            self._curve = curve
+            self._pieces = [None] * len(self._pieces)
+            self._whole = None
+        if not self._pieces:
+            return []
+        limit = len(self._pieces) // self.crowded
+        if curve:
+            segments = self._spline.near(
+                points, left, top, right, bottom, limit,
+            )
+        else:
+            segments = self._grid.segments_in(left, top, right, bottom, limit)
+            if segments is not None:
+                segments = [dex - 1 for dex in segments]
+        if segments is None:
+            if self._whole is None:
+                if None in self._pieces:
+                    self._fill(points)
+                self._whole = [points[0]]
+                self._whole.extend(
+                    itertools.chain.from_iterable(self._pieces),
+                )
+                if self._whole[-1] != points[-1]:
+                    self._whole.append(points[-1])
+            return [self._whole]
+        runs = []
+        for dex in segments:
+            if runs and runs[-1][1] == dex - 1:
+                runs[-1][1] = dex
+            else:
+                runs.append([dex, dex])
+        lines = []
+        pieces = self._pieces
+        for first, last in runs:
+            if None in pieces[first:last + 1]:
+                for dex, piece in enumerate(pieces[first:last + 1], first):
+                    if piece is None:
+                        self._piece(points, dex)
+            line = [self._before(points, first)]
+            line.extend(itertools.chain.from_iterable(pieces[first:last + 1]))
+            after = self._after(points, last)
+            if after != line[-1]:
+                line.append(after)
+            lines.append(line)
+        return lines
+
+    def thinned(self: Self,
+                points: Sequence[Pos],
+                level: int,
+                left: Real,
+                top: Real,
+                right: Real,
+                bottom: Real) -> list[int]:
+        # the points in the box that are first in their cell of the
+        # level-th step, in order
+        if self._firsts is None:
+            firsts = thin(points, self._steps[0])
+            self._firsts = [firsts] + [
+                thin(points, step, firsts.values())
+                for step in self._steps[1:]
+            ]
+        firsts = self._firsts[level]
+        step = self._steps[level]
+        first_x, first_y = left // step, top // step
+        last_x, last_y = right // step, bottom // step
+        if (last_x - first_x + 1) * (last_y - first_y + 1) > len(firsts):
+            found = firsts.values()
+        else:
+            found = [
+                firsts[cell] for cell in itertools.product(
+                    range(int(first_x), int(last_x) + 1),
+                    range(int(first_y), int(last_y) + 1),
+                )
+                if cell in firsts
+            ]
+        return sorted(
+            dex for dex in found
+            if left <= points[dex][0] <= right
+            and top <= points[dex][1] <= bottom
+        )
@@ -0,0 +1,185 @@
+from numbers import Real
+from typing import Self
+from typing import Optional
+
+from path import Path
+
+
+Pose = tuple[Real, Real, Real]
+
+
+# Commands are applied to and reverted from a target with the editing
+# interface of Path (insert, delete, set_pose, flip, assign), so anything
+# that mirrors the path can stay in step without a full rebuild.
+# nbytes is a rough size of what the command keeps alive.
+class Command(object):
+    nbytes = 64
+
+    def apply(self: Self, target: Path) -> None:
+        pass
+
+    def revert(self: Self, target: Path) -> None:
+        pass
+
+    def merge(self: Self, other: 'Command') -> bool:
+        # fold other into self if it continues the same edit
+        return False
+
+    @property
+    def empty(self: Self) -> bool:
+        return False
+
+
+class Insert(Command):
+    def __init__(self: Self, dex: int, pose: Pose) -> None:
+        self.dex = dex
+        self.pose = tuple(pose)
+
+    def apply(self: Self, target: Path) -> None:
+        target.insert(self.dex, *self.pose)
+
+    def revert(self: Self, target: Path) -> None:
+        target.delete(self.dex)
+
+
+class Delete(Command):
+    def __init__(self: Self, dex: int, pose: Pose) -> None:
+        self.dex = dex
+        self.pose = tuple(pose)
+
+    def apply(self: Self, target: Path) -> None:
+        target.delete(self.dex)
+
+    def revert(self: Self, target: Path) -> None:
+        target.insert(self.dex, *self.pose)
+
+
+class Move(Command): # position and heading
+    def __init__(self: Self, dex: int, old: Pose, new: Pose) -> None:
+        self.dex = dex
+        self.old = tuple(old)
+        self.new = tuple(new)
+
+    def apply(self: Self, target: Path) -> None:
+        target.set_pose(self.dex, *self.new)
+
+    def revert(self: Self, target: Path) -> None:
+        target.set_pose(self.dex, *self.old)
+
+    def merge(self: Self, other: Command) -> bool:
+        # a drag is many moves of the same point
+        if isinstance(other, Move) and other.dex == self.dex:
+            self.new = other.new
+            return True
+        return False
+
+    @property
+    def empty(self: Self) -> bool:
+        return self.old == self.new
+
+
+class Flip(Command):
+    def apply(self: Self, target: Path) -> None:
+        target.flip()
+
+    def revert(self: Self, target: Path) -> None:
+        target.flip()
+
+
+class Replace(Command): # whole path, e.g. clearing
+    def __init__(self: Self, old: Path, new: Path) -> None:
+        self.old = old.copy()
+        self.new = new.copy()
+        self.nbytes = 64 + 24 * (len(old) + len(new))
+
+    def apply(self: Self, target: Path) -> None:
+        target.assign(self.new)
+
+    def revert(self: Self, target: Path) -> None:
+        target.assign(self.old)
+
+    @property
+    def empty(self: Self) -> bool:
+        return self.old == self.new
+
+
+# Undo/redo as a list of steps, each a list of commands. Commands are
+# collected with do() and grouped into one step by commit(), which is
+# what the app calls when an edit is finished (mouse up, button press).
+# The oldest steps are dropped past max_steps or max_bytes.
+class History(object):
+    def __init__(self: Self,
+                 max_steps: Optional[int]=1000,
+                 max_bytes: Optional[int]=64_000_000) -> None:
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+        self._steps = []
+        self._change = 0 # steps currently applied
+        self._pending = []
+        self._nbytes = 0
+
+    def __len__(self: Self) -> int:
+        return len(self._steps)
+
+    @property
+    def nbytes(self: Self) -> int:
+        return self._nbytes
+
+    def clear(self: Self) -> None:
+        self._steps = []
+        self._change = 0
+        self._pending = []
+        self._nbytes = 0
+
+    def do(self: Self, command: Command, target: Path) -> None:
+        command.apply(target)
+        if self._pending and self._pending[-1].merge(command):
+            return None
+        self._pending.append(command)
+
+    def commit(self: Self) -> bool:
+        step = [command for command in self._pending if not command.empty]
+        self._pending = []
+        if not step:
+            return False
+        for old in self._steps[self._change:]:
+            self._nbytes -= sum(command.nbytes for command in old)
+        del self._steps[self._change:]
+        self._steps.append(step)
+        self._change += 1
+        self._nbytes += sum(command.nbytes for command in step)
+        self._trim()
+        return True
+
+    def _trim(self: Self) -> None:
+        drop = 0
+        while drop < len(self._steps) - 1 and (
+                (self.max_steps is not None
+                 and len(self._steps) - drop > self.max_steps)
+                or (self.max_bytes is not None
+                    and self._nbytes > self.max_bytes)):
+            self._nbytes -= sum(
+                command.nbytes for command in self._steps[drop]
+            )
+            drop += 1
+        if drop:
+            del self._steps[:drop]
+            self._change -= drop
+
+    def undo(self: Self, target: Path) -> bool:
+        self.commit()
+        if not self._change:
+            return False
+        self._change -= 1
+        for command in reversed(self._steps[self._change]):
+            command.revert(target)
+        return True
+
+    def redo(self: Self, target: Path) -> bool:
+        self.commit()
+        if self._change >= len(self._steps):
+            return False
+        for command in self._steps[self._change]:
+            command.apply(target)
+        self._change += 1
+        return True
@@ -1,30 +1,68 @@
 import os
-import sys
 import platform
 import math
 import time
-import copy
 from numbers import Real
 from typing import Self
+from typing import Optional
 
 import pygame as pg
 from pygame.typing import Point
 from pygame.typing import ColorLike
+from pygame.typing import RectLike
 
 from panel import Surface
+from panel import SurfaceCache
 from panel import Label
 from panel import Button
 from panel import Toggle
 from panel import Input
+from panel import List
+from panel import Slider
 from panel import Panel
+from panel import text_cache
+from core import Waypoint
+from core import PathEditor
+from core import Trajectory
+from core import Limits
+from core import templates
+from core import gen_data_path
+import autosave
+import odometry
+import pathfile
+import detail
 
 
-def gen_data_path(*args: str):
-    if getattr(sys, "frozen", False):
-        directory = sys.prefix
-    else:
-        directory = os.getcwd()
-    return os.path.join(directory, 'data', *args)
+# LRU cache of rotated robot footprints. Headings are quantized to
+# heading_step degrees so a path only needs a handful of surfaces.
+# Has to be cleared when the robot size changes.
+class FootprintCache(SurfaceCache):
+    def __init__(self: Self,
+                 max_size: int=256,
+                 heading_step: Real=1) -> None:
+        super().__init__(max_size)
+        self.heading_step = heading_step
+
+    def _make(self: Self,
+              size: Point,
+              color: ColorLike,
+              line_width: int,
+              heading: Real) -> pg.Surface:
+        surf = pg.Surface(size)
+        surf.set_colorkey((0, 0, 0))
+        pg.draw.rect(surf, color, ((0, 0), size), width=line_width)
+        return pg.transform.rotate(surf, heading)
+
+    def get(self: Self,
+            size: Point,
+            color: ColorLike,
+            line_width: int,
+            heading: Real) -> pg.Surface:
+        heading = round(heading / self.heading_step) * self.heading_step % 360
+        key = (tuple(size), tuple(pg.Color(color)), line_width, heading)
+        return self._get(
+            key, lambda: self._make(size, color, line_width, heading),
+        )
 
 
 class Game(object):
@@ -32,12 +70,34 @@ class Game(object):
     _SCREEN_SIZE = (1080, 810)
     _SCREEN_FLAGS = pg.RESIZABLE | pg.SCALED
     _GAME_SPEED = 60
+    _IDLE_TIMEOUT = 1000 # ms to sleep on the event queue while idle
+    _IMPORT_BUDGET = 0.008 # seconds per frame spent importing a log
+    # events after which the whole window has to be redrawn
+    _EXPOSE_EVENTS = (
+        pg.VIDEOEXPOSE,
+        pg.WINDOWEXPOSED,
+        pg.WINDOWSHOWN,
+        pg.WINDOWRESTORED,
+        pg.WINDOWSIZECHANGED,
+    )
 
     def __init__(self: Self) -> None:
         pg.init()
 
         self._settings = {
             'vsync': 1,
+            'dirty_rects': 1, # only redraw and push damaged regions
+            'idle': 1, # block on events while nothing is animating
+            'history_steps': 1000, # undo steps kept
+            'history_bytes': 64_000_000, # rough memory cap for undo
+            'autosave': 1, # save the path in the background, restore it
+            'autosave_file': autosave.DEFAULT_FILE,
+            'autosave_delay': 1.0, # seconds without edits before saving
+            # where "Save" writes the path when it wasn't dropped in
+            'path_file': os.path.join(os.path.expanduser('~'), 'coyote.path'),
+            'timeout_margin': 1.0, # seconds added to each leg's timeout
+            'simplify_tolerance': 0.5, # inches a dropped point may be off
+            'simplify_heading': 5.0, # degrees a dropped heading may be off
         }
         self._screen = pg.display.set_mode(
             self._SCREEN_SIZE,
@@ -46,6 +106,10 @@ class Game(object):
         )
         pg.display.set_caption('Coyote')
         self._running = 0
+        self._clock = pg.time.Clock()
+        self._stats = {
+            'event_time': 0, # seconds spent in _handle_events last frame
+        }
 
         pg.key.set_repeat(300, 75)
 
@@ -64,6 +128,7 @@ class Game(object):
             'heading': (0, 255, 255),
             'robot': (0, 0, 255), # cannot be (0, 0, 0)
             'visualizer': (255, 255, 0),
+            'log': (255, 128, 0),
         }
         self._KEYS = {
             'mod': (
@@ -83,6 +148,12 @@ class Game(object):
             / self._FIELD_SIZE[1]
             * self._FIELD_IMAGE_SIZE[1],
         )
+        self._footprints = FootprintCache()
+        self._layers = {
+            'path': pg.Surface(self._SCREEN_SIZE).convert(),
+            'log': pg.Surface(self._FIELD_IMAGE_SIZE).convert(),
+        }
+        self._layers['log'].set_colorkey(self._COLORS['fill'])
         self._images = {
             'field': pg.transform.scale(
                 pg.image.load(gen_data_path('field.png')).convert(),
@@ -97,25 +168,65 @@ class Game(object):
         self._heading_length = 24
         self._robot_line_width = 2
         self._field_pos_precision = 2
+
+        # Damage tracking
+        self._rects = {
+            'screen': pg.Rect((0, 0), self._SCREEN_SIZE),
+            'panel': pg.Rect(
+                (self._FIELD_IMAGE_SIZE[0], 0),
+                (self._SCREEN_SIZE[0] - self._FIELD_IMAGE_SIZE[0],
+                 self._SCREEN_SIZE[1]),
+            ),
+        }
+        self._dirty = [self._rects['screen'].copy()]
+        self._path_dirty = [self._rects['screen'].copy()]
             
+        # path, its screen view and history
+        self._editor = PathEditor(
+            self._FIELD_SIZE,
+            self._FIELD_IMAGE_SIZE,
+            self._field_pos_precision,
+            history_steps=self._settings['history_steps'],
+            history_bytes=self._settings['history_bytes'],
+        )
+        self._path = self._editor.path
+        self._view = self._editor.view
+        self._autosaver = None # started on the first change
+        # (filename, binary) of the path file dropped in, saved back to
+        self._path_file = None
+
         # currently selected
-        self._points = []
-        self._screen_points = []
+        self._points_version = 0 # path version shown in the points list
+        self._limits = Limits()
+        self._auton_time_key = None # (path version, limits) of the time shown
         self._clicking = -1
         self._selected = -1
+        self._drag_pos = None # pending position of the dragged point
         
-        # History
-        self._history = [copy.deepcopy(self._screen_points)] # screen points
-        self._change = 0
 
         # Visualizer
         self._visualizer_time = 1.25
-        self._visualizer_timer = 0
-        self._visualizer_leg = -1
         self._visualizer_speed = 150
+        self._trajectory = None
+        self._trajectory_key = None # (path version, smooth, curve) of it
+        self._visualizer_progress = 0 # 0 to 1 along the timeline
+        self._visualizer_playing = False
+        self._visualizer_shown = False
+        self._visualizer_poses = [] # (point, heading, color) of the ghosts
+        self._visualizer_rects = [] # where they were last drawn
+
+        # Odometry log, drawn in its own layer as it is imported
+        self._track = None
+        self._track_points = [] # screen positions of the track
+        self._log_import = None # chunks left to read, while importing
         
         # Widgets
         self._widgets = {
+            'curve': Toggle(
+                (self._FIELD_IMAGE_SIZE[0] + 60, 90),
+                font=self._FONTS['main'],
+                on_change=self._update_curve,
+            ),
             'visualizer': {
                 'smooth': Toggle(
                     (self._FIELD_IMAGE_SIZE[0] + 60, 130),
@@ -126,50 +237,93 @@ class Game(object):
                     width=200,
                     max_chars=25,
                     font=self._FONTS['main'],
+                    on_change=self._update_speed,
+                ),
+                'scrub': Slider(
+                    (self._FIELD_IMAGE_SIZE[0] + 100, 170),
+                    width=160,
+                    height=self._FONTS['main'].get_height(),
+                    on_change=self._scrub,
                 ),
             },
             'robot': {
                 'show': Toggle(
                     (self._FIELD_IMAGE_SIZE[0] + 60, 230),
                     font=self._FONTS['main'],
+                    on_change=self._update_robot_show,
                 ),
                 'width': Input(
                     (self._FIELD_IMAGE_SIZE[0] + 60, 250),
                     width=200,
                     max_chars=25,
                     font=self._FONTS['main'],
+                    on_change=self._update_robot,
                 ),
                 'length': Input(
                     (self._FIELD_IMAGE_SIZE[0] + 60, 270),
                     width=200,
                     max_chars=25,
                     font=self._FONTS['main'],
+                    on_change=self._update_robot,
+                ),
+            },
+            'motion': {
+                'velocity': Input(
+                    (self._FIELD_IMAGE_SIZE[0] + 60, 330),
+                    width=200,
+                    max_chars=25,
+                    font=self._FONTS['main'],
+                    on_change=self._update_limits,
+                ),
+                'acceleration': Input(
+                    (self._FIELD_IMAGE_SIZE[0] + 60, 350),
+                    width=200,
+                    max_chars=25,
+                    font=self._FONTS['main'],
+                    on_change=self._update_limits,
+                ),
+                'turn': Input(
+                    (self._FIELD_IMAGE_SIZE[0] + 60, 370),
+                    width=200,
+                    max_chars=25,
+                    font=self._FONTS['main'],
+                    on_change=self._update_limits,
+                ),
+                'time': Label(
+                    (self._FIELD_IMAGE_SIZE[0] + 60, 390),
+                    text='0.00 s',
+                    font=self._FONTS['main'],
                 ),
             },
             'point': {
                 'x': Input(
-                    (self._FIELD_IMAGE_SIZE[0] + 60, 330),
+                    (self._FIELD_IMAGE_SIZE[0] + 60, 450),
                     width=200,
                     max_chars=25,
                     font=self._FONTS['main'],
+                    on_change=self._update_point,
                 ),
                 'y': Input(
-                    (self._FIELD_IMAGE_SIZE[0] + 60, 350),
+                    (self._FIELD_IMAGE_SIZE[0] + 60, 470),
                     width=200,
                     max_chars=25,
                     font=self._FONTS['main'],
+                    on_change=self._update_point,
                 ),
                 'heading': Input(
-                    (self._FIELD_IMAGE_SIZE[0] + 60, 370),
+                    (self._FIELD_IMAGE_SIZE[0] + 60, 490),
                     width=200,
                     max_chars=25,
                     font=self._FONTS['main'],
+                    on_change=self._update_point,
                 ),
             },
-            'points': Label(
-                (self._FIELD_IMAGE_SIZE[0] + 10, 430),
-                text='',
+            'points': List(
+                (self._FIELD_IMAGE_SIZE[0] + 10, 550),
+                width=self._SCREEN_SIZE[0] - self._FIELD_IMAGE_SIZE[0] - 10,
+                view_height=self._SCREEN_SIZE[1],
                 font=self._FONTS['main'],
+                func=self._select_point,
             ),
         }
         self._widgets['visualizer']['smooth'].state = True
@@ -177,6 +331,13 @@ class Game(object):
         self._widgets['robot']['show'].state = True
         self._widgets['robot']['length'].text = str(self._robot_size[0])
         self._widgets['robot']['width'].text = str(self._robot_size[1])
+        self._widgets['motion']['velocity'].text = str(
+            self._limits.max_velocity,
+        )
+        self._widgets['motion']['acceleration'].text = str(
+            self._limits.acceleration,
+        )
+        self._widgets['motion']['turn'].text = str(self._limits.angular_rate)
         self._panel = Panel(
             widgets={
                 Label(
@@ -190,18 +351,42 @@ class Game(object):
                     func=self._clear_path,
                     font=self._FONTS['main'],
                 ),
+                Button(
+                    (self._FIELD_IMAGE_SIZE[0] + 100, 30),
+                    text='Save',
+                    func=self._save_path,
+                    font=self._FONTS['main'],
+                ),
                 Button(
                     (self._FIELD_IMAGE_SIZE[0] + 10, 50),
                     text='Flip',
                     func=self._flip_path,
                     font=self._FONTS['main'],
                 ),
+                Button(
+                    (self._FIELD_IMAGE_SIZE[0] + 100, 50),
+                    text='Simplify',
+                    func=self._simplify_path,
+                    font=self._FONTS['main'],
+                ),
                 Button(
                     (self._FIELD_IMAGE_SIZE[0] + 10, 70),
                     text='Copy code',
                     func=self._copy_code,
                     font=self._FONTS['main'],
                 ),
+                Label(
+                    (self._FIELD_IMAGE_SIZE[0] + 10, 90),
+                    text='Curv',
+                    font=self._FONTS['main'],
+                ),
+                self._widgets['curve'],
+                Button(
+                    (self._FIELD_IMAGE_SIZE[0] + 100, 90),
+                    text='Clear log',
+                    func=self._clear_log,
+                    font=self._FONTS['main'],
+                ),
                 Label(
                     (self._FIELD_IMAGE_SIZE[0] + 10, 110),
                     text='Visualizer',
@@ -219,6 +404,7 @@ class Game(object):
                     font=self._FONTS['main'],
                 ),
                 self._widgets['visualizer']['speed'],
+                self._widgets['visualizer']['scrub'],
                 Button(
                     (self._FIELD_IMAGE_SIZE[0] + 10, 170),
                     text='Visualize',
@@ -250,46 +436,77 @@ class Game(object):
                 self._widgets['robot']['length'],
                 Label(
                     (self._FIELD_IMAGE_SIZE[0] + 10, 310),
-                    text='Point',
+                    text='Motion',
                     font=self._FONTS['title'],
                 ),
                 Label(
                     (self._FIELD_IMAGE_SIZE[0] + 10, 330),
+                    text='Velo',
+                    font=self._FONTS['main'],
+                ),
+                self._widgets['motion']['velocity'],
+                Label(
+                    (self._FIELD_IMAGE_SIZE[0] + 10, 350),
+                    text='Acce',
+                    font=self._FONTS['main'],
+                ),
+                self._widgets['motion']['acceleration'],
+                Label(
+                    (self._FIELD_IMAGE_SIZE[0] + 10, 370),
+                    text='Turn',
+                    font=self._FONTS['main'],
+                ),
+                self._widgets['motion']['turn'],
+                Label(
+                    (self._FIELD_IMAGE_SIZE[0] + 10, 390),
+                    text='Time',
+                    font=self._FONTS['main'],
+                ),
+                self._widgets['motion']['time'],
+                Label(
+                    (self._FIELD_IMAGE_SIZE[0] + 10, 430),
+                    text='Point',
+                    font=self._FONTS['title'],
+                ),
+                Label(
+                    (self._FIELD_IMAGE_SIZE[0] + 10, 450),
                     text='X',
                     font=self._FONTS['main'],
                 ),
                 self._widgets['point']['x'],
                 Label(
-                    (self._FIELD_IMAGE_SIZE[0] + 10, 350),
+                    (self._FIELD_IMAGE_SIZE[0] + 10, 470),
                     text='Y',
                     font=self._FONTS['main'],
                 ),
                 self._widgets['point']['y'],
                 Label(
-                    (self._FIELD_IMAGE_SIZE[0] + 10, 370),
+                    (self._FIELD_IMAGE_SIZE[0] + 10, 490),
                     text='Head',
                     font=self._FONTS['main'],
                 ),
                 self._widgets['point']['heading'],
                 Label(
-                    (self._FIELD_IMAGE_SIZE[0] + 10, 410),
+                    (self._FIELD_IMAGE_SIZE[0] + 10, 530),
                     text='Points',
                     font=self._FONTS['title'],
                 ),
                 self._widgets['points'],
             },
-            min_scroll=-self._SCREEN_SIZE[1],
+            rect=self._rects['panel'],
+            bgcolor=self._COLORS['fill'],
         )
 
-    def _update_widgets(self: Self) -> None:
-        # Visualizer
+    # Called by the widgets when the user changes them
+
+    def _update_speed(self: Self) -> None:
         try:
             speed = float(self._widgets['visualizer']['speed'].text)
         except:
             speed = 150
         self._visualizer_speed = speed
-        
-        # Robot Display
+
+    def _update_robot(self: Self) -> None:
         width = self._widgets['robot']['width']
         try:
             width = float(width.text)
@@ -300,6 +517,15 @@ class Game(object):
             length = float(length.text)
         except:
             length = 18
+        # sizes that are not positive, like the "0" of "0.5" being typed,
+        # keep the last ones
+        if not 0 < width < math.inf:
+            width = self._robot_size[1]
+        if not 0 < length < math.inf:
+            length = self._robot_size[0]
+        if (length, width) != self._robot_size:
+            self._footprints.clear()
+            self._mark_path_dirty()
         self._robot_size = (length, width)
         self._robot_rect_size = (
             self._robot_size[0]
@@ -310,63 +536,169 @@ class Game(object):
             * self._FIELD_IMAGE_SIZE[1],
         )
 
-        # Selected Point
-        if self._selected != -1:
-            # I'm not sure if there's a better way
-            x = self._widgets['point']['x']
-            try:
-                x = float(x.text)
-            except:
-                x = 0
-            y = self._widgets['point']['y']
-            try:
-                y = float(y.text)
-            except:
-                y = 0
-            self._points[self._selected][0] = (x, y)
-            self._screen_points[self._selected] = self._gen_screen_pos((x, y))
-            heading = self._widgets['point']['heading']
-            try:
-                heading = float(heading.text)
-            except:
-                heading = 0
-            self._points[self._selected][1] = heading
-
-        # Points
-        text = ''
-        for point in self._points:
-            text += '['
-            text += str(round(point[0][0], self._field_pos_precision))
-            text += ', '
-            text += str(round(point[0][1], self._field_pos_precision))
-            text += ', '
-            text += str(round(point[1], self._field_pos_precision))
-            text += ']'
-            text += '\n'
-        self._widgets['points'].text = text
-
-    def _gen_field_pos(self: Self, screen_pos: Point) -> tuple:
-        return (
-            (screen_pos[0] - self._FIELD_IMAGE_SIZE[0] / 2)
-            / self._FIELD_IMAGE_SIZE[0]
-            * self._FIELD_SIZE[1],
-            -(screen_pos[1] - self._FIELD_IMAGE_SIZE[1] / 2)
-            / self._FIELD_IMAGE_SIZE[1]
-            * self._FIELD_SIZE[1],
+    def _update_limits(self: Self) -> None:
+        default = Limits()
+        velocity = self._widgets['motion']['velocity']
+        try:
+            velocity = float(velocity.text)
+        except:
+            velocity = default.max_velocity
+        acceleration = self._widgets['motion']['acceleration']
+        try:
+            acceleration = float(acceleration.text)
+        except:
+            acceleration = default.acceleration
+        turn = self._widgets['motion']['turn']
+        try:
+            turn = float(turn.text)
+        except:
+            turn = default.angular_rate
+        try:
+            self._limits = Limits(velocity, acceleration, turn)
+        except ValueError:
+            self._limits = default
+
+    def _update_robot_show(self: Self) -> None:
+        self._mark_path_dirty()
+
+    def _update_curve(self: Self) -> None:
+        self._mark_path_dirty()
+
+    def _update_point(self: Self) -> None:
+        if self._selected == -1:
+            return None
+        # I'm not sure if there's a better way
+        x = self._widgets['point']['x']
+        try:
+            x = float(x.text)
+        except:
+            x = 0
+        y = self._widgets['point']['y']
+        try:
+            y = float(y.text)
+        except:
+            y = 0
+        heading = self._widgets['point']['heading']
+        try:
+            heading = float(heading.text)
+        except:
+            heading = 0
+        if self._path[self._selected].pose != (x, y, heading):
+            self._mark_point_dirty(self._selected)
+            self._editor.move(self._selected, (x, y, heading))
+            self._mark_point_dirty(self._selected)
+
+    def _update_points_list(self: Self) -> None:
+        # only rows of points that changed were regenerated
+        if self._points_version != self._path.version:
+            self._widgets['points'].rows = self._view.rows
+            self._points_version = self._path.version
+        self._widgets['points'].selected = self._selected
+
+    def _update_auton_time(self: Self) -> None:
+        # predicted time for the whole path, without the timeout margins
+        key = (self._path.version, self._limits)
+        if self._auton_time_key != key:
+            self._widgets['motion']['time'].text = (
+                f'{self._editor.total_time(self._limits):.2f} s'
+            )
+            self._auton_time_key = key
+
+    def _select_point(self: Self, dex: int) -> None:
+        self._selected = dex
+        self._set_point_widget(self._path[dex])
+        self._mark_path_dirty()
+
+    def _mark_dirty(self: Self, rect: Optional[RectLike]=None) -> None:
+        if rect is None:
+            rect = self._rects['screen']
+        self._dirty.append(pg.Rect(rect))
+
+    def _point_rect(self: Self, point: Point) -> pg.Rect:
+        # everything _draw_point and the index label can cover
+        radius = max(self._heading_length, self._point_radius) + 1
+        if self._widgets['robot']['show'].state:
+            radius = max(
+                radius,
+                math.hypot(*self._robot_rect_size) / 2
+                + self._robot_line_width,
+            )
+        rect = pg.Rect(0, 0, radius * 2 + 2, radius * 2 + 2)
+        rect.center = point
+        label = self._FONTS['main'].size(str(len(self._path)))
+        return rect.union(pg.Rect(point, label))
+
+    def _mark_path_dirty(self: Self, rect: Optional[RectLike]=None) -> None:
+        # the cached path layer has to be redrawn there as well
+        if rect is None:
+            rect = self._rects['screen']
+        self._path_dirty.append(pg.Rect(rect))
+        self._mark_dirty(rect)
+
+    def _mark_point_dirty(self: Self, dex: int) -> None:
+        # the points next to it and every segment whose shape depends on it
+        screen_points = self._view.points
+        for i in range(max(dex - 1, 0), min(dex + 2, len(screen_points))):
+            self._mark_path_dirty(self._point_rect(screen_points[i]))
+        if self._widgets['curve'].state:
+            segments = range(
+                max(dex - 2, 0), min(dex + 2, len(self._view.spline)),
+            )
+        else:
+            segments = range(
+                max(dex - 1, 0), min(dex + 1, len(screen_points) - 1),
+            )
+        for i in segments:
+            self._mark_path_dirty(self._segment_rect(i))
+        # another point of its cells may be drawn in its place
+        for step in self._detail_steps():
+            left, top, right, bottom = detail.cell_bounds(
+                screen_points[dex], step,
+            )
+            if self._view.grid.count(left, top, right, bottom, 2) < 2:
+                continue
+            self._mark_path_dirty(
+                self._point_rect((left, top)).union(
+                    self._point_rect((right, bottom)),
+                ),
+            )
+
+    def _segment_rect(self: Self, dex: int) -> pg.Rect:
+        # everything the line from point dex to the next can cover
+        screen_points = self._view.points
+        if self._widgets['curve'].state:
+            left, top, right, bottom = self._view.spline.segment(
+                screen_points, dex,
+            ).bounds
+        else:
+            (x1, y1), (x2, y2) = screen_points[dex], screen_points[dex + 1]
+            left, top, right, bottom = (
+                min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2),
+            )
+        return pg.Rect(
+            left - self._line_width - 1,
+            top - self._line_width - 1,
+            right - left + self._line_width * 2 + 3,
+            bottom - top + self._line_width * 2 + 3,
         )
 
-    def _gen_screen_pos(self: Self, field_pos: Point) -> pg.Vector2:
-        return pg.Vector2(
-            (field_pos[0] / self._FIELD_SIZE[0] + 0.5)
-            * self._FIELD_IMAGE_SIZE[0],
-            (-field_pos[1] / self._FIELD_SIZE[1] + 0.5)
-            * self._FIELD_IMAGE_SIZE[1],
+    def _detail_steps(self: Self) -> tuple[Real, Real, Real]:
+        # cell sizes for markers, footprints and labels: points closer
+        # than these would draw over each other. The larger two are
+        # multiples of the first, so they can thin what it kept.
+        step = self._point_radius * 2
+        return (
+            step,
+            max(step, step * math.ceil(min(self._robot_rect_size) / 4 / step)),
+            max(step, step * math.ceil(
+                max(self._FONTS['main'].size(str(len(self._path)))) / step,
+            )),
         )
 
-    def _set_point_widget(self: Self, point: list[Point, Real]) -> None:
-        self._widgets['point']['x'].text = str(point[0][0])
-        self._widgets['point']['y'].text = str(point[0][1])
-        self._widgets['point']['heading'].text = str(point[1])
+    def _set_point_widget(self: Self, point: Waypoint) -> None:
+        self._widgets['point']['x'].text = str(point.x)
+        self._widgets['point']['y'].text = str(point.y)
+        self._widgets['point']['heading'].text = str(point.heading)
 
     def _set_point_widget_auto(self: Self, pos: Point) -> None:
         # auto means not using keyboard, which is manually
@@ -379,263 +711,535 @@ class Game(object):
         )
 
     def _clear_path(self: Self) -> None:
-        self._screen_points = []
-        self._points = []
+        self._editor.clear()
+        self._clicking = self._selected = -1
+        self._mark_path_dirty()
+        self._finish_change()
+
+    def _save_path(self: Self) -> None:
+        filename, binary = self._path_file or (
+            self._settings['path_file'], False,
+        )
+        try:
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            pathfile.save(self._path, filename, binary)
+        except OSError as error:
+            pg.display.message_box('Could not save the path', str(error))
+            return None
+        pg.display.message_box(f'Saved to {filename}', '')
+
+    def _load_path(self: Self, filename: str) -> None:
+        # a dropped path file replaces the path, and one undo brings the
+        # old one back
+        try:
+            path = pathfile.load(filename)
+            binary = pathfile.is_binary(filename)
+        except (OSError, ValueError) as error:
+            pg.display.message_box('Could not open the path', str(error))
+            return None
+        self._path_file = (filename, binary)
+        self._editor.replace(path)
         self._clicking = self._selected = -1
+        self._mark_path_dirty()
         self._finish_change()
 
     def _flip_path(self: Self) -> None:
-        for dex, point in enumerate(self._points):
-            point[0] = (point[0][0], -point[0][1])
-            point[1] = -point[1]
-            if dex == self._selected:
-                self._set_point_widget(point)
-        for point in self._screen_points:
-            point[1] = self._FIELD_IMAGE_SIZE[1] - point[1]
+        self._editor.flip()
+        if self._selected != -1:
+            self._set_point_widget(self._path[self._selected])
+        self._mark_path_dirty()
         self._finish_change()
-        self._update_widgets()
+
+    def _simplify_path(self: Self) -> None:
+        removed = self._editor.simplify(
+            self._settings['simplify_tolerance'],
+            self._settings['simplify_heading'],
+        )
+        if removed:
+            self._clicking = self._selected = -1
+            self._mark_path_dirty()
+            self._finish_change()
+        pg.display.message_box(f'Removed {removed} points', '')
 
     def _copy_code(self: Self) -> None:
-        if self._points:
-            with open(gen_data_path('code', 'start.txt')) as file:
-                code = file.read().format(
-                    self._points[0][0][0],
-                    self._points[0][0][1],
-                    self._points[0][1],
-                )
-            with open(gen_data_path('code', 'leg.txt')) as file:
-                leg = file.read()
-            for dex, point in enumerate(self._points[1:]):
-                code += leg.format(point[0][0], point[0][1], point[1], dex)
-            pg.scrap.put_text(code)
+        if self._path:
+            pg.scrap.put_text(self._editor.code(
+                templates.get(gen_data_path('code', 'start.txt')),
+                templates.get(gen_data_path('code', 'leg.txt')),
+                self._limits,
+                self._settings['timeout_margin'],
+            ))
             pg.display.message_box('Code copied to clipboard', '')
             return None
         pg.display.message_box('No points set', '')
 
     def _visualize(self: Self) -> None:
-        self._visualizer_leg = 0 if self._points else -1
-        self._visualizer_timer = 0
+        if len(self._path) < 2 and not self._track:
+            return None
+        self._visualizer_progress = 0
+        self._visualizer_playing = True
+        self._visualizer_shown = True
+
+    def _scrub(self: Self) -> None:
+        # dragging the slider pauses the ghosts where it is dropped
+        if len(self._path) < 2 and not self._track:
+            return None
+        self._visualizer_progress = (
+            self._widgets['visualizer']['scrub'].value
+        )
+        self._visualizer_playing = False
+        self._visualizer_shown = True
+
+    def _import_log(self: Self, filename: str) -> None:
+        # read a chunk at a time by _update_import, decimated to a pixel
+        self._clear_log()
+        self._track = odometry.Track(
+            self._FIELD_SIZE[0] / self._FIELD_IMAGE_SIZE[0],
+        )
+        self._log_import = odometry.read(filename)
+
+    def _clear_log(self: Self) -> None:
+        if self._log_import is not None:
+            self._log_import.close()
+        self._log_import = None
+        self._track = None
+        self._track_points = []
+        self._layers['log'].fill(self._COLORS['fill'])
+        self._mark_path_dirty()
+
+    def _sync_trajectory(self: Self) -> Trajectory:
+        # rebuilt only when the path, the smoothing or the curve changed
+        key = (
+            self._path.version,
+            self._widgets['visualizer']['smooth'].state,
+            self._widgets['curve'].state,
+        )
+        if self._trajectory is None or self._trajectory_key != key:
+            self._trajectory = Trajectory(
+                self._view.points,
+                self._path.headings,
+                smooth=key[1],
+                curves=(
+                    self._view.spline.segments(self._view.points)
+                    if key[2] else None
+                ),
+            )
+            self._trajectory_key = key
+        return self._trajectory
 
     def _finish_change(self: Self) -> None:
-        if self._change < len(self._history) - 1:
-            self._history = self._history[:self._change + 1]
-        if self._history[-1] != self._points:
-            self._change += 1
-            self._history.append(copy.deepcopy(self._points))
+        if self._editor.commit():
+            self._autosave()
+
+    def _autosave(self: Self) -> None:
+        if not self._settings['autosave']:
+            return None
+        if self._autosaver is None:
+            self._autosaver = autosave.Autosaver(
+                self._settings['autosave_file'],
+                self._settings['autosave_delay'],
+            )
+        self._autosaver.request(self._path)
+
+    def _restore(self: Self) -> None:
+        path = autosave.restore(self._settings['autosave_file'])
+        if path is not None:
+            self._view.assign(path)
+            self._mark_path_dirty()
 
     def _draw_point(self: Self,
+                    surf: pg.Surface,
                     point: Point,
                     heading: Real,
                     point_color: ColorLike,
                     robot_color: ColorLike,
-                    heading_color: ColorLike) -> None:
-        pg.draw.aacircle(
-            self._screen, point_color, point, self._point_radius,
-        )
-        if self._widgets['robot']['show'].state: # Drawing Robot
-            surf = pg.Surface(self._robot_rect_size)
-            surf.set_colorkey((0, 0, 0))
-            pg.draw.rect(
-                surf,
+                    heading_color: ColorLike,
+                    marker: bool=True,
+                    footprint: bool=True) -> None:
+        if marker:
+            pg.draw.aacircle(surf, point_color, point, self._point_radius)
+        if footprint and self._widgets['robot']['show'].state: # Drawing Robot
+            robot = self._footprints.get(
+                self._robot_rect_size,
                 robot_color,
-                ((0, 0), self._robot_rect_size),
-                width=self._robot_line_width,
+                self._robot_line_width,
+                heading,
             )
-            surf = pg.transform.rotate(surf, heading)
-            self._screen.blit(
-                surf,
-                (point[0] - surf.width / 2,
-                 point[1] - surf.height / 2),
+            surf.blit(
+                robot,
+                (point[0] - robot.width / 2,
+                 point[1] - robot.height / 2),
             )
+        if not marker:
+            return None
         angle = math.radians(heading)
         vector = (
             pg.Vector2(math.cos(angle), -math.sin(angle))
             * self._heading_length
         )
         pg.draw.aaline(
-            self._screen,
+            surf,
             heading_color,
             point,
             point + vector,
         )
 
-    def run(self: Self) -> None:
-        self._running = 1
-        start_time = time.time()
-
-        while self._running:
-            delta_time = time.time() - start_time
-            start_time = time.time()
+    def _apply_drag(self: Self) -> bool:
+        if self._drag_pos is None:
+            return False
+        if self._clicking != -1:
+            self._mark_point_dirty(self._clicking)
+            pos = self._editor.round_pos(self._editor.to_field(self._drag_pos))
+            heading = self._path[self._clicking].heading
+            self._editor.move(self._clicking, (*pos, heading))
+            self._set_point_widget_auto(pos)
+            self._mark_point_dirty(self._clicking)
+        self._drag_pos = None
+        return True
 
-            rel_game_speed = delta_time * self._GAME_SPEED
-
-            for event in pg.event.get():
-                self._panel.handle_event(event)
-                if event.type == pg.QUIT:
-                    self._running = 0
-                elif (event.type == pg.MOUSEBUTTONDOWN
-                      and event.pos[0] < self._FIELD_IMAGE_SIZE[0]):
-                    # clicking, creating on a line, creating is priority order
-                    vector = pg.Vector2(event.pos)
-                    for i in range(len(self._screen_points) - 1, -1, -1):
-                        point = self._screen_points[i]
-                        if (vector.distance_to(point)
-                            <= self._point_select_radius):
-                            self._clicking = self._selected = i
-                            self._set_point_widget(self._points[i])
-                            break
+    def _handle_events(self: Self, events: list[pg.Event]) -> None:
+        start = time.perf_counter()
+        for event in events:
+            if event.type != pg.MOUSEMOTION:
+                # anything else sees the path as the user does
+                self._apply_drag()
+            self._panel.handle_event(event)
+            if event.type in self._EXPOSE_EVENTS:
+                self._mark_dirty()
+            if event.type == pg.QUIT:
+                self._running = 0
+            elif event.type == pg.DROPFILE:
+                if pathfile.is_path_file(event.file):
+                    self._load_path(event.file)
+                else:
+                    self._import_log(event.file)
+            elif (event.type == pg.MOUSEBUTTONDOWN
+                  and event.pos[0] < self._FIELD_IMAGE_SIZE[0]):
+                # selecting or inserting can renumber every label
+                self._mark_path_dirty()
+                # clicking, creating on a line, creating is priority order
+                vector = pg.Vector2(event.pos)
+                dex = self._view.grid.pick(vector, self._point_select_radius)
+                if dex != -1:
+                    self._clicking = self._selected = dex
+                    self._set_point_widget(self._path[dex])
+                else:
+                    if self._widgets['curve'].state:
+                        dex = self._view.spline.pick(
+                            self._view.points,
+                            vector,
+                            self._line_point_distance,
+                        )
                     else:
-                        for dex, point in enumerate(self._screen_points):
-                            if not dex:
-                                continue
-                            # https://stackoverflow.com/a/1501725/24845999
-                            # projects point onto line segment
-                            # vector projection formula but 
-                            # without final multiplication
-                            # then calculates distance to that point
-                            prev = self._screen_points[dex - 1]
-                            difference = point - prev
-                            t = pg.math.clamp(
-                                difference.dot(vector - prev)
-                                / difference.magnitude_squared(),
-                                0, 1,
-                            )
-                            projection = prev + t * difference
-                            distance = vector.distance_to(projection)
-                            if distance <= self._line_point_distance:
-                                self._clicking = self._selected = dex
-                                self._screen_points.insert(dex, vector)
-                                pos = self._gen_field_pos(event.pos)
-                                self._points.insert(dex, [pos, 0])
-                                break
-                        else:
-                            self._clicking = len(self._screen_points)
-                            self._selected = self._clicking
-                            self._screen_points.append(vector)
-                            pos = self._gen_field_pos(event.pos)
-                            self._points.append([pos, 0])
-                        self._set_point_widget_auto(pos)
-                        self._widgets['point']['heading'].text = '0'
-                elif event.type == pg.MOUSEMOTION and self._clicking != -1:
-                    new = self._screen_points[self._clicking] + event.rel
-                    new[0] = pg.math.clamp(
-                        new[0], 0, self._FIELD_IMAGE_SIZE[0],
-                    )
-                    new[1] = pg.math.clamp(
-                        new[1], 0, self._FIELD_IMAGE_SIZE[1],
+                        dex = self._view.grid.pick_segment(
+                            vector, self._line_point_distance,
+                        )
+                    if dex == -1:
+                        dex = len(self._path)
+                    self._clicking = self._selected = dex
+                    pos = self._editor.round_pos(
+                        self._editor.to_field(event.pos),
                     )
-                    self._screen_points[self._clicking] = new
-                    pos = self._gen_field_pos(new)
-                    self._points[self._clicking][0] = pos
+                    self._editor.insert(dex, pos)
                     self._set_point_widget_auto(pos)
-                elif event.type == pg.MOUSEBUTTONUP:
-                    self._clicking = -1
+                    self._widgets['point']['heading'].text = '0'
+            elif event.type == pg.MOUSEMOTION and self._clicking != -1:
+                # only the position is tracked here, _apply_drag puts it
+                # in the path once per frame
+                if self._drag_pos is None:
+                    self._drag_pos = pg.Vector2(
+                        self._view.points[self._clicking],
+                    )
+                new = self._drag_pos + event.rel
+                new[0] = pg.math.clamp(
+                    new[0], 0, self._FIELD_IMAGE_SIZE[0],
+                )
+                new[1] = pg.math.clamp(
+                    new[1], 0, self._FIELD_IMAGE_SIZE[1],
+                )
+                self._drag_pos = new
+            elif event.type == pg.MOUSEBUTTONUP:
+                self._clicking = -1
+                self._finish_change()
+            elif event.type == pg.KEYDOWN and not self._panel.focused:
+                if event.key == pg.K_BACKSPACE and self._selected != -1:
+                    self._editor.delete(self._selected)
+                    self._clicking = self._selected = -1
+                    self._mark_path_dirty()
                     self._finish_change()
-                elif event.type == pg.KEYDOWN and not self._panel.focused:
-                    if event.key == pg.K_BACKSPACE and self._selected != -1:
-                        del self._screen_points[self._selected]
-                        del self._points[self._selected]
-                        self._clicking = self._selected = -1
-                        self._finish_change()
-                    elif event.key == pg.K_z and event.mod & self._KEYS['mod']:
-                        if event.mod & self._KEYS['mod2']: # redo
-                            self._change = min(
-                                self._change + 1, len(self._history) - 1,
-                            )
-                        else: # undo
-                            self._change = max(self._change - 1, 0)
-                        self._points = copy.deepcopy(self._history[self._change])
-                        self._screen_points = []
-                        for point, heading in self._points:
-                            self._screen_points.append(
-                                self._gen_screen_pos(point)
-                            )
-                        self._clicking = self._selected = -1
-                self._update_widgets()
-
-            self._panel.update(pg.mouse.get_pos(), pg.mouse.get_pressed())
-            
-            # Draw Field
-            self._screen.fill(self._COLORS['fill'])
-            self._screen.blit(self._images['field'], (0, 0))
-            # Draw Path
-            if len(self._screen_points) > 1:
+                elif event.key == pg.K_z and event.mod & self._KEYS['mod']:
+                    if event.mod & self._KEYS['mod2']: # redo
+                        changed = self._editor.redo()
+                    else: # undo
+                        changed = self._editor.undo()
+                    if changed:
+                        self._autosave()
+                    self._clicking = self._selected = -1
+                    self._mark_path_dirty()
+        self._apply_drag()
+        self._stats['event_time'] = time.perf_counter() - start
+
+    def _update_import(self: Self) -> None:
+        if self._log_import is None:
+            return None
+        start = time.perf_counter()
+        try:
+            while time.perf_counter() - start < self._IMPORT_BUDGET:
+                self._track.extend(next(self._log_import))
+        except StopIteration:
+            self._track.finish()
+            self._log_import = None
+        except (OSError, ValueError) as error:
+            self._clear_log()
+            pg.display.message_box('Could not import the log', str(error))
+            return None
+
+        # Only the new part of the track is drawn
+        track = self._track
+        new = len(self._track_points)
+        if new == len(track):
+            return None
+        self._track_points.extend(
+            self._view.to_screen(pos)
+            for pos in zip(track.xs[new:], track.ys[new:])
+        )
+        points = self._track_points[max(new - 1, 0):]
+        if len(points) > 1:
+            self._mark_path_dirty(pg.draw.lines(
+                self._layers['log'], self._COLORS['log'], False, points,
+            ))
+
+    def _update_visualizer(self: Self, delta_time: Real) -> None:
+        for rect in self._visualizer_rects:
+            self._mark_dirty(rect)
+        self._visualizer_rects = []
+        self._visualizer_poses = []
+        if not self._visualizer_shown:
+            return None
+        trajectory = self._sync_trajectory() if len(self._path) > 1 else None
+        track = self._track if self._track else None
+        if trajectory is None and track is None:
+            self._visualizer_shown = self._visualizer_playing = False
+            return None
+
+        # Poses, one binary search each
+        progress = min(self._visualizer_progress, 1)
+        if trajectory is not None:
+            x, y, heading = trajectory.pose_at(progress * trajectory.duration)
+            self._visualizer_poses.append(
+                (pg.Vector2(x, y), heading, self._COLORS['visualizer']),
+            )
+        if track is not None:
+            x, y, heading = track.pose_at(
+                track.start + progress * track.duration,
+            )
+            self._visualizer_poses.append((
+                pg.Vector2(self._view.to_screen((x, y))),
+                heading,
+                self._COLORS['log'],
+            ))
+        for point, _, _ in self._visualizer_poses:
+            self._visualizer_rects.append(self._point_rect(point))
+            self._mark_dirty(self._visualizer_rects[-1])
+        scrub = self._widgets['visualizer']['scrub']
+        if not scrub.dragging:
+            scrub.value = progress
+
+        # Timer, at the visualizer speed along the path, else as logged
+        if self._visualizer_playing:
+            if self._visualizer_progress >= 1:
+                self._visualizer_playing = self._visualizer_shown = False
+            if trajectory is not None and trajectory.duration:
+                rate = (
+                    self._visualizer_speed / self._visualizer_time
+                    / trajectory.duration
+                )
+            elif track is not None and track.duration:
+                rate = 1 / track.duration
+            else:
+                rate = math.inf
+            self._visualizer_progress += delta_time * rate
+
+    def _draw_path(self: Self) -> None:
+        surf = self._layers['path']
+        # Draw Field
+        surf.fill(self._COLORS['fill'])
+        surf.blit(self._images['field'], (0, 0))
+        if self._track:
+            surf.blit(self._layers['log'], (0, 0))
+        # Draw Path
+        screen_points = self._view.points
+        headings = self._path.headings
+        path_detail = self._view.detail
+        path_detail.set_steps(self._detail_steps())
+        # only the line and points that can reach the area being redrawn
+        clip = surf.get_clip()
+        margin = self._line_width + 3
+        for line in path_detail.lines(
+            screen_points,
+            self._widgets['curve'].state,
+            clip.left - margin,
+            clip.top - margin,
+            clip.right + margin,
+            clip.bottom + margin,
+        ):
+            if len(line) > 1:
                 pg.draw.aalines(
-                    self._screen,
+                    surf,
                     self._COLORS['line'],
                     0,
-                    self._screen_points,
+                    line,
                     self._line_width,
                 )
-            # i know its not enumerate
-            for dex, point in enumerate(self._screen_points):
-                point_color = (
-                    self._COLORS['selected'] if dex == self._selected
-                    else self._COLORS['point']
-                )
-                self._draw_point(
-                    point,
-                    self._points[dex][1],
-                    point_color,
-                    self._COLORS['robot'],
-                    self._COLORS['heading'],
-                )
-                self._screen.blit(
-                    self._FONTS['main'].render(
+        extent = self._point_rect((0, 0))
+        reach = pg.Rect(
+            clip.left - extent.right - 1,
+            clip.top - extent.bottom - 1,
+            clip.width + extent.width + 2,
+            clip.height + extent.height + 2,
+        )
+        box = (reach.left, reach.top, reach.right, reach.bottom)
+        drawn = path_detail.thinned(screen_points, 0, *box)
+        markers = set(drawn)
+        footprints, labels = (
+            set(path_detail.thinned(screen_points, level, *box))
+            for level in (1, 2)
+        )
+        if self._selected != -1 and self._selected not in markers:
+            # drawn over the rest, so it can always be seen
+            drawn.append(self._selected)
+        for dex in drawn:
+            point = screen_points[dex]
+            if not reach.collidepoint(point):
+                continue
+            point_color = (
+                self._COLORS['selected'] if dex == self._selected
+                else self._COLORS['point']
+            )
+            self._draw_point(
+                surf,
+                point,
+                headings[dex],
+                point_color,
+                self._COLORS['robot'],
+                self._COLORS['heading'],
+                marker=dex in markers or dex == self._selected,
+                footprint=dex in footprints or dex == self._selected,
+            )
+            if dex in labels or dex == self._selected:
+                surf.blit(
+                    text_cache.render(
+                        self._FONTS['main'],
                         str(dex),
-                        1,
                         self._COLORS['number'],
                     ),
                     point,
                 )
 
-            # Draw Visualization
-            if -1 < self._visualizer_leg < len(self._points) - 1:
-                # Math
-                vector1 = self._screen_points[self._visualizer_leg]
-                vector2 = self._screen_points[self._visualizer_leg + 1]
-                timer = pg.math.clamp(
-                    self._visualizer_timer / self._visualizer_time, 0, 1,
-                )
-                if self._widgets['visualizer']['smooth'].state:
-                    point = vector1.smoothstep(vector2, timer)
-                    heading = pg.math.smoothstep(
-                        self._points[self._visualizer_leg][1],
-                        self._points[self._visualizer_leg + 1][1],
-                        timer,
-                    )
-                else:
-                    point = vector1.lerp(vector2, timer)
-                    heading = pg.math.lerp(
-                        self._points[self._visualizer_leg][1],
-                        self._points[self._visualizer_leg + 1][1],
-                        timer,
-                    )
-                # Draw
-                color = self._COLORS['visualizer']
-                self._draw_point(point, heading, color, color, color)
-                # Timer
-                self._visualizer_timer = min(
-                    self._visualizer_timer
-                    + (delta_time
-                       / vector1.distance_to(vector2)
-                       * self._visualizer_speed),
-                    self._visualizer_time,
-                )
-                if self._visualizer_timer >= self._visualizer_time:
-                    self._visualizer_leg += 1
-                    self._visualizer_timer = 0
-                    if self._visualizer_leg >= len(self._points) - 1:
-                        self._visualizer_leg = -1
+    def _draw(self: Self) -> None:
+        # Field, path and points are cached in their own layer
+        self._screen.blit(self._layers['path'], (0, 0))
+
+        # Draw Visualization
+        for point, heading, color in self._visualizer_poses:
+            self._draw_point(
+                self._screen, point, heading, color, color, color,
+            )
+
+        # Draw Panel
+        self._panel.render(self._screen)
 
-            # Draw Panel
-            self._panel.render(self._screen)
+    def _merge_rects(self: Self, dirty: list[pg.Rect]) -> list[pg.Rect]:
+        # merge overlapping damage so nothing is drawn twice
+        rects = []
+        for rect in dirty:
+            rect = rect.clip(self._rects['screen'])
+            if not rect.width or not rect.height:
+                continue
+            dex = rect.collidelist(rects)
+            while dex != -1:
+                rect.union_ip(rects.pop(dex))
+                dex = rect.collidelist(rects)
+            rects.append(rect)
+        return rects
 
+    def _render(self: Self) -> None:
+        if self._path_dirty:
+            layer = self._layers['path']
+            for rect in self._merge_rects(self._path_dirty):
+                layer.set_clip(rect)
+                self._draw_path()
+            layer.set_clip(None)
+            self._path_dirty = []
+
+        if not self._settings['dirty_rects']:
+            self._draw()
             pg.display.update()
+            self._dirty = []
+            return None
+        if not self._dirty:
+            return None
+
+        rects = self._merge_rects(self._dirty)
+        self._dirty = []
+        for rect in rects:
+            self._screen.set_clip(rect)
+            self._draw()
+        self._screen.set_clip(None)
+        pg.display.update(rects)
+
+    def _idle(self: Self) -> bool:
+        # nothing is animating, being dragged or waiting to be drawn
+        return (
+            not self._visualizer_playing
+            and self._log_import is None
+            and self._clicking == -1
+            and not self._dirty
+            and not self._path_dirty
+        )
+
+    def _step(self: Self,
+              delta_time: Real,
+              events: Optional[list[pg.Event]]=None) -> None:
+        if events is None:
+            events = pg.event.get()
+        self._handle_events(events)
+        self._update_points_list()
+        self._update_auton_time()
+        if self._panel.update(pg.mouse.get_pos(), pg.mouse.get_pressed()):
+            self._mark_dirty(self._rects['panel'])
+        self._update_import()
+        self._update_visualizer(delta_time)
+        self._render()
 
+    def run(self: Self) -> None:
+        if self._settings['autosave']:
+            self._restore()
+        self._running = 1
+        start_time = time.time()
+
+        while self._running:
+            events = []
+            if self._settings['idle'] and self._idle():
+                event = pg.event.wait(self._IDLE_TIMEOUT)
+                if event.type != pg.NOEVENT:
+                    events.append(event)
+                # time spent asleep should not advance anything
+                start_time = time.time()
+            events.extend(pg.event.get())
+
+            delta_time = time.time() - start_time
+            start_time = time.time()
+
+            self._step(delta_time, events)
+            self._clock.tick(self._GAME_SPEED)
+
+        if self._autosaver is not None:
+            self._autosaver.close()
         pg.quit()
 
 
 if __name__ == '__main__':
     Game().run()
-
@@ -0,0 +1,132 @@
+import math
+from itertools import pairwise
+from numbers import Real
+from typing import Self
+from typing import Iterable
+
+
+Pose = tuple[Real, Real, Real]
+
+
+# What the robot can do: top speed in inches per second, acceleration in
+# inches per second squared and turning rate in degrees per second.
+class Limits(object):
+    def __init__(self: Self,
+                 max_velocity: Real=30,
+                 acceleration: Real=30,
+                 angular_rate: Real=120) -> None:
+        # NaN compares false to everything, so it is checked for on its own
+        if not all(
+            math.isfinite(limit) and limit > 0
+            for limit in (max_velocity, acceleration, angular_rate)
+        ):
+            raise ValueError('robot limits have to be positive and finite')
+        self.max_velocity = max_velocity
+        self.acceleration = acceleration
+        self.angular_rate = angular_rate
+
+    def __eq__(self: Self, other: object) -> bool:
+        if not isinstance(other, Limits):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self: Self) -> int:
+        return hash(self._key())
+
+    def __repr__(self: Self) -> str:
+        return 'Limits({}, {}, {})'.format(*self._key())
+
+    def _key(self: Self) -> tuple[Real, Real, Real]:
+        return (self.max_velocity, self.acceleration, self.angular_rate)
+
+
+def drive_time(distance: Real,
+               max_velocity: Real,
+               acceleration: Real) -> float:
+    # trapezoidal profile from rest to rest: speed up, cruise, slow down.
+    # Legs too short to reach max_velocity never cruise (a triangle).
+    if distance <= 0:
+        return 0.0
+    ramp = max_velocity * max_velocity / acceleration # speeding up and down
+    if distance < ramp:
+        return 2 * math.sqrt(distance / acceleration)
+    return 2 * max_velocity / acceleration + (distance - ramp) / max_velocity
+
+
+def leg_time(start: Pose, end: Pose, limits: Limits) -> float:
+    # the robot drives and turns at once, so the slower of the two counts
+    distance = math.hypot(end[0] - start[0], end[1] - start[1])
+    turn = abs((end[2] - start[2] + 180) % 360 - 180)
+    return max(
+        drive_time(distance, limits.max_velocity, limits.acceleration),
+        turn / limits.angular_rate,
+    )
+
+
+def leg_times(poses: Iterable[Pose], limits: Limits) -> list[float]:
+    return [leg_time(start, end, limits) for start, end in pairwise(poses)]
+
+
+# The time of every leg of a path, patched edit by edit: an edit to one
+# point only changes the legs on either side of it, so only those are
+# timed again and the total is corrected by the difference. Everything is
+# timed again after reset() or with other limits. The path is passed in on
+# every call, like Spline's points.
+class LegTimes(object):
+    def __init__(self: Self) -> None:
+        self.timed = 0 # legs timed so far
+        self._limits = None # limits the times are for, None when stale
+        self._times = []
+        self._total = 0.0
+
+    def _leg(self: Self, path, dex: int) -> float:
+        xs, ys, headings = path.xs, path.ys, path.headings
+        self.timed += 1
+        return leg_time(
+            (xs[dex], ys[dex], headings[dex]),
+            (xs[dex + 1], ys[dex + 1], headings[dex + 1]),
+            self._limits,
+        )
+
+    def _replace(self: Self, path, first: int, old: int, new: int) -> None:
+        # old legs from first on became new ones
+        if self._limits is None:
+            return None
+        times = [self._leg(path, dex) for dex in range(first, first + new)]
+        self._total += sum(times) - sum(self._times[first:first + old])
+        self._times[first:first + old] = times
+
+    def reset(self: Self) -> None:
+        self._limits = None
+
+    def insert(self: Self, path, dex: int) -> None:
+        # point dex was inserted into path
+        first = max(dex - 1, 0)
+        new = max(min(dex, len(path) - 2) - first + 1, 0)
+        self._replace(path, first, max(new - 1, 0), new)
+
+    def delete(self: Self, path, dex: int) -> None:
+        # point dex was deleted from path
+        first = max(dex - 1, 0)
+        old = min(dex, len(path) - 1) - first + 1
+        self._replace(path, first, old, int(0 < dex < len(path)))
+
+    def move(self: Self, path, dex: int) -> None:
+        first = max(dex - 1, 0)
+        legs = max(min(dex, len(path) - 2) - first + 1, 0)
+        self._replace(path, first, legs, legs)
+
+    def _update(self: Self, path, limits: Limits) -> None:
+        if self._limits != limits:
+            self._limits = limits
+            self._times = leg_times(path.poses(), limits)
+            self._total = math.fsum(self._times)
+            self.timed += len(self._times)
+
+    def times(self: Self, path, limits: Limits) -> list[float]:
+        self._update(path, limits)
+        return self._times
+
+    def total(self: Self, path, limits: Limits) -> float:
+        self._update(path, limits)
+        return self._total
@@ -0,0 +1,185 @@
+import sys
+import struct
+import itertools
+from array import array
+from bisect import bisect_right
+from numbers import Real
+from typing import Self
+from typing import Iterator
+
+
+# Pose logs recorded on the robot, one sample per odometry update: time in
+# seconds, x and y in inches and heading in degrees.
+#
+# CSV: one sample per line as time, x, y, heading. A header line, blank
+# lines and lines starting with # are skipped.
+#
+# Binary: a 12 byte header (magic, version, reserved) followed by one record
+# of little-endian doubles time, x, y, heading per sample until the end of
+# the file. A record cut short by the robot stopping mid-write is ignored.
+#
+# Both are read a chunk at a time, so a log is never in memory as a whole.
+
+VERSION = 1
+
+_MAGIC = b'COYOTE\x00L'
+_HEADER = struct.Struct('<8sHH')
+_RECORD = struct.Struct('<dddd')
+_CHUNK = 2048 # samples read at a time
+
+Columns = tuple[array, array, array, array]
+
+
+def _read_csv(file, chunk: int) -> Iterator[Columns]:
+    number = 0
+    while True:
+        lines = list(itertools.islice(file, chunk))
+        if not lines:
+            return None
+        times, xs, ys, headings = (
+            array('d'), array('d'), array('d'), array('d'),
+        )
+        for line in lines:
+            number += 1
+            try:
+                time, x, y, heading = map(float, line.split(','))
+            except ValueError:
+                line = line.strip()
+                if not line or line.startswith('#') or number == 1:
+                    continue
+                raise ValueError(
+                    f'line {number}: expected time, x, y and heading, '
+                    f'got {line!r}'
+                ) from None
+            times.append(time)
+            xs.append(x)
+            ys.append(y)
+            headings.append(heading)
+        yield (times, xs, ys, headings)
+
+
+def _read_binary(file, chunk: int) -> Iterator[Columns]:
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError('pose log is truncated')
+    _, version, _ = _HEADER.unpack(header)
+    if version > VERSION:
+        raise ValueError(f'unsupported pose log version {version}')
+    while True:
+        data = file.read(chunk * _RECORD.size)
+        data = data[:len(data) - len(data) % _RECORD.size]
+        if not data:
+            return None
+        records = array('d')
+        records.frombytes(data)
+        if sys.byteorder != 'little':
+            records.byteswap()
+        yield (records[0::4], records[1::4], records[2::4], records[3::4])
+
+
+def read(filename: str, chunk: int=_CHUNK) -> Iterator[Columns]:
+    # (times, xs, ys, headings) of every chunk of samples in a log of
+    # either kind, told apart by the magic
+    with open(filename, 'rb') as file:
+        binary = file.read(len(_MAGIC)) == _MAGIC
+    if binary:
+        with open(filename, 'rb') as file:
+            yield from _read_binary(file, chunk)
+    else:
+        with open(filename) as file:
+            yield from _read_csv(file, chunk)
+
+
+def write_binary(file, times, xs, ys, headings) -> None:
+    # what the robot would write, for tests and benchmarks
+    file.write(_HEADER.pack(_MAGIC, VERSION, 0))
+    records = array('d', bytes(len(times) * _RECORD.size))
+    records[0::4] = array('d', times)
+    records[1::4] = array('d', xs)
+    records[2::4] = array('d', ys)
+    records[3::4] = array('d', headings)
+    if sys.byteorder != 'little':
+        records.byteswap()
+    file.write(records)
+
+
+# A log decimated as it streams in: a sample is kept when it is resolution
+# inches from the last kept one, turned turn degrees from it or gap seconds
+# after it, so waiting in place still replays as waiting. finish() adds the
+# last sample read when it was not kept. samples counts everything read.
+class Track(object):
+    def __init__(self: Self,
+                 resolution: Real,
+                 turn: Real=2,
+                 gap: Real=0.1) -> None:
+        self.resolution = resolution
+        self.turn = turn
+        self.gap = gap
+        self.samples = 0
+        self.times = array('d')
+        self.xs = array('d')
+        self.ys = array('d')
+        self.headings = array('d')
+        self._last = None # last sample read, when it was not kept
+
+    def __len__(self: Self) -> int:
+        return len(self.times)
+
+    @property
+    def start(self: Self) -> float:
+        return self.times[0]
+
+    @property
+    def duration(self: Self) -> float:
+        return self.times[-1] - self.times[0]
+
+    def _keep(self: Self, time, x, y, heading) -> None:
+        self.times.append(time)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.headings.append(heading)
+
+    def extend(self: Self, columns: Columns) -> None:
+        times, xs, ys, headings = columns
+        if not times:
+            return None
+        self.samples += len(times)
+        if not self.times:
+            self._keep(times[0], xs[0], ys[0], headings[0])
+        resolution_squared = self.resolution * self.resolution
+        last_time, last_x, last_y, last_heading = (
+            self.times[-1], self.xs[-1], self.ys[-1], self.headings[-1],
+        )
+        keep = self._keep
+        for time, x, y, heading in zip(times, xs, ys, headings):
+            if ((x - last_x) ** 2 + (y - last_y) ** 2 >= resolution_squared
+                or abs((heading - last_heading + 180) % 360 - 180)
+                >= self.turn
+                or time - last_time >= self.gap):
+                if time < last_time:
+                    raise ValueError('pose log times go backwards')
+                keep(time, x, y, heading)
+                last_time, last_x, last_y, last_heading = time, x, y, heading
+        self._last = None
+        if last_time != times[-1]:
+            self._last = (times[-1], xs[-1], ys[-1], headings[-1])
+
+    def finish(self: Self) -> None:
+        if self._last is not None:
+            self._keep(*self._last)
+            self._last = None
+
+    def pose_at(self: Self, time: Real) -> tuple[float, float, float]:
+        dex = bisect_right(self.times, time) # first sample after time
+        if dex == 0:
+            return (self.xs[0], self.ys[0], self.headings[0])
+        if dex == len(self.times):
+            return (self.xs[-1], self.ys[-1], self.headings[-1])
+        start, end = self.times[dex - 1], self.times[dex]
+        t = (time - start) / (end - start)
+        turn = (self.headings[dex] - self.headings[dex - 1] + 180) % 360 - 180
+        return (
+            self.xs[dex - 1] + (self.xs[dex] - self.xs[dex - 1]) * t,
+            self.ys[dex - 1] + (self.ys[dex] - self.ys[dex - 1]) * t,
+            self.headings[dex - 1] + turn * t,
+        )
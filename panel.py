@@ -1,16 +1,114 @@
+import math
+from bisect import bisect_right
+from collections import OrderedDict
 from numbers import Real
 from typing import Self
 from typing import Optional
 from typing import Callable
+from typing import Hashable
 
 import pygame as pg
 from pygame.typing import Point
 from pygame.typing import ColorLike
+from pygame.typing import RectLike
+
+
+# LRU cache of surfaces, dropping the least recently used ones once there
+# are more than max_size or they add up to more than max_pixels. Surfaces
+# handed out are shared, so callers must not draw on them.
+class SurfaceCache(object):
+    def __init__(self: Self,
+                 max_size: int,
+                 max_pixels: Real=math.inf) -> None:
+        self._surfs = OrderedDict()
+        self._max_size = max_size
+        self._max_pixels = max_pixels
+        self._pixels = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self: Self) -> int:
+        return len(self._surfs)
+
+    @property
+    def stats(self: Self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._surfs),
+        }
+
+    def clear(self: Self) -> None:
+        self._surfs.clear()
+        self._pixels = 0
+
+    def _get(self: Self,
+             key: Hashable,
+             make: Callable[[], pg.Surface]) -> pg.Surface:
+        # the surface under key, made with make() on a miss
+        surf = self._surfs.get(key)
+        if surf is not None:
+            self.hits += 1
+            self._surfs.move_to_end(key)
+            return surf
+        self.misses += 1
+
+        surf = make()
+        self._surfs[key] = surf
+        self._pixels += surf.width * surf.height
+        while len(self._surfs) > 1 and (
+                len(self._surfs) > self._max_size
+                or self._pixels > self._max_pixels):
+            old = self._surfs.popitem(last=False)[1]
+            self._pixels -= old.width * old.height
+            self.evictions += 1
+        return surf
+
+
+# Shared cache of rendered text so the same string is only rasterized once.
+class TextCache(SurfaceCache):
+    def __init__(self: Self,
+                 max_size: int=1024,
+                 max_pixels: int=4_000_000) -> None:
+        # big multi-line labels add up, so pixels are limited too
+        super().__init__(max_size, max_pixels)
+
+    def render(self: Self,
+               font: pg.Font,
+               text: str,
+               color: ColorLike,
+               bgcolor: Optional[ColorLike]=None,
+               wraplength: int=0) -> pg.Surface:
+        key = (
+            font,
+            font.bold,
+            font.italic,
+            font.underline,
+            text,
+            tuple(pg.Color(color)),
+            None if bgcolor is None else tuple(pg.Color(bgcolor)),
+            wraplength,
+        )
+        return self._get(key, lambda: font.render(
+            text, 1, color, bgcolor=bgcolor, wraplength=wraplength,
+        ))
+
+
+text_cache = TextCache()
 
 
 # If _rect is set by child class, child class should make sure
-# it takes scroll into account
+# it takes scroll into account.
+# A child class that redraws surf in place should bump revision so Panel
+# knows to composite it again.
+# overlay is (color, rect) for Panel to fill over surf, rect relative to
+# the widget, so small marks like a caret don't need a new surf.
 class _Widget(object):
+    revision = 0
+    overlay = None
+
     def __init__(self: Self, pos: Point, size: Point=(0, 0)) -> None:
         self._surf = pg.Surface(size)
         self._rect = pg.Rect(pos, size)
@@ -25,6 +123,11 @@ class _Widget(object):
     def pos(self: Self) -> tuple:
         return (self._pos[0], self._pos[1] + self._scroll)
 
+    @property
+    def bottom(self: Self) -> Real:
+        # where the content ends, ignoring scroll
+        return self._pos[1] + self._surf.height
+
     @property
     def scroll(self: Self) -> Real:
         return self._scroll
@@ -77,9 +180,9 @@ class Label(_Widget):
     @text.setter
     def text(self: Self, value: str) -> None:
         self._text = value
-        self._surf = self._font.render(
+        self._surf = text_cache.render(
+            self._font,
             value,
-            1,
             (255, 255, 255),
             bgcolor=self._bgcolor,
             wraplength=self._wraplength,
@@ -111,7 +214,7 @@ class Button(_Widget): # Text Button
     @text.setter
     def text(self: Self, value: str) -> None:
         self._text = value
-        text = self._font.render(value, 1, (255, 255, 255))
+        text = text_cache.render(self._font, value, (255, 255, 255))
         self._rect = pg.Rect(self._pos, text.size)
         self._rect.y = self._pos[1] + self._scroll
         
@@ -152,13 +255,17 @@ class Toggle(_Widget):
     # hover: outline blue
     # click: blue
 
+    # on_change is only called when the user toggles it
+
     def __init__(self: Self,
                  pos: Point,
                  font: pg.Font,
-                 text: str=' X ') -> None:
+                 text: str=' X ',
+                 on_change: Optional[Callable]=None) -> None:
 
         super().__init__(pos)
         self._font = font
+        self._on_change = on_change
         self.text = text
         self._surf = self._surfs[0]
         self._state = False
@@ -178,7 +285,7 @@ class Toggle(_Widget):
     @text.setter
     def text(self: Self, value: str) -> None:
         self._text = value
-        text = self._font.render(value, 1, (255, 255, 255))
+        text = text_cache.render(self._font, value, (255, 255, 255))
         self._rect = pg.Rect(self._pos, text.size)
         self._rect.y = self._pos[1] + self._scroll
         
@@ -210,6 +317,8 @@ class Toggle(_Widget):
         if (event.type == pg.MOUSEBUTTONDOWN
             and self._rect.collidepoint(event.pos)):
                 self._state = not self._state
+                if self._on_change is not None:
+                    self._on_change()
 
     def update(self: Self,
                mouse_pos: Point,
@@ -221,17 +330,22 @@ class Toggle(_Widget):
             self._surf = self._surfs[2 + collision]
 
 class Input(_Widget): # Text Input
+    # on_change is only called when the user edits the text,
+    # not when it is set from code
+
     def __init__(self: Self,
                  pos: Point,
                  width: int,
                  max_chars: int,
-                 font: pg.Font) -> None:
+                 font: pg.Font,
+                 on_change: Optional[Callable]=None) -> None:
 
         super().__init__(pos)
         self._width = width
         self._height = font.get_height()
         self._font = font
         self._max_chars = max_chars
+        self._on_change = on_change
 
         self._focused = 0
         self._cursor_pos = 0
@@ -239,12 +353,13 @@ class Input(_Widget): # Text Input
         self.text = ''
 
     @property
-    def surf(self: Self) -> None:
-        surf = self._surf.copy()
-        if self._focused:
-            width = self._font.size(self._text[:self._cursor_pos])[0]
-            pg.draw.rect(surf, (255, 255, 255), (width, 0, 1, self._height))
-        return surf
+    def overlay(self: Self) -> Optional[tuple]:
+        if not self._focused:
+            return None
+        return (
+            (255, 255, 255),
+            (self._widths[self._cursor_pos], 0, 1, self._height),
+        )
 
     @property
     def text(self: Self) -> str:
@@ -254,7 +369,12 @@ class Input(_Widget): # Text Input
     def text(self: Self, value: str) -> None:
         self._text = value[:self._max_chars]
         self._cursor_pos = min(self._cursor_pos, len(value))
-        text = self._font.render(self._text, 1, (255, 255, 255))
+        # width of every prefix, for the caret and placing the cursor
+        self._widths = [
+            self._font.size(self._text[:dex])[0]
+            for dex in range(len(self._text) + 1)
+        ]
+        text = text_cache.render(self._font, self._text, (255, 255, 255))
         self._surf = pg.Surface((self._width, self._height))
         self._surf.blit(text, (0, 0))
         pg.draw.rect(
@@ -281,20 +401,23 @@ class Input(_Widget): # Text Input
         self._cursor_pos = pg.math.clamp(self._cursor_pos, 0, len(self._text))
 
     def handle_event(self: Self, event: pg.Event) -> None:
+        old = self._text
+        self._handle_event(event)
+        if self._text != old and self._on_change is not None:
+            self._on_change()
+
+    def _handle_event(self: Self, event: pg.Event) -> None:
         length = len(self._text)
         if event.type == pg.MOUSEBUTTONDOWN:
             collision = self._rect.collidepoint(event.pos)
             if collision: # calculate cursor pos
                 x = event.pos[0] - self._pos[0]
-                old = 0 # last width calculated
-                for dex in range(len(self._text) + 1):
-                    width = self._font.size(self._text[:dex])[0]
-                    if old <= x < width:
-                        # past middle it will go to dex
-                        # before middile it will go to dex - 1
-                        self._cursor_pos = dex - (x < (width + old) / 2)
-                        break
-                    old = width
+                dex = bisect_right(self._widths, x) # first prefix past x
+                if 0 < dex <= len(self._text):
+                    # past middle it will go to dex
+                    # before middile it will go to dex - 1
+                    middle = (self._widths[dex] + self._widths[dex - 1]) / 2
+                    self._cursor_pos = dex - (x < middle)
                 else:
                     self._cursor_pos = len(self._text)
             self._focused = collision
@@ -339,19 +462,213 @@ class Input(_Widget): # Text Input
                     self._focused = 0
 
 
+# Only the rows inside the visible window are drawn, so the list can hold
+# any number of rows. Row surfaces come from text_cache and are reused.
+# func is called with the index of a row when it is clicked.
+class List(_Widget):
+    def __init__(self: Self,
+                 pos: Point,
+                 width: int,
+                 view_height: int,
+                 font: pg.Font,
+                 func: Optional[Callable]=None) -> None:
+
+        super().__init__(pos)
+        self._width = width
+        self._view_height = view_height # visible height of the panel
+        self._font = font
+        self._func = func
+        self._row_height = font.get_linesize()
+        self._surf = pg.Surface((width, view_height), pg.SRCALPHA)
+        self._rows = []
+        self._selected = -1
+        self._drawn = None # what _surf currently shows
+        self._rect = pg.Rect(self._pos, (self._width, 0))
+
+    @property
+    def rows(self: Self) -> list[str]:
+        return self._rows
+
+    @rows.setter
+    def rows(self: Self, value: list[str]) -> None:
+        self._rows = value
+        self._rect.height = len(value) * self._row_height
+        self._drawn = None
+
+    @property
+    def selected(self: Self) -> int:
+        return self._selected
+
+    @selected.setter
+    def selected(self: Self, value: int) -> None:
+        if value != self._selected:
+            self._selected = value
+            self._drawn = None
+
+    @property
+    def bottom(self: Self) -> Real:
+        return self._pos[1] + len(self._rows) * self._row_height
+
+    @property
+    def pos(self: Self) -> tuple:
+        return (self._pos[0], max(self._pos[1] + self._scroll, 0))
+
+    @property
+    def surf(self: Self) -> pg.Surface:
+        top = self._pos[1] + self._scroll
+        if self._drawn != top:
+            self._draw(top)
+        return self._surf
+
+    def _draw(self: Self, top: Real) -> None:
+        self._drawn = top
+        self.revision += 1
+        self._surf.fill((0, 0, 0, 0))
+        # first visible row and where it lands on _surf
+        first = max(int(-top // self._row_height), 0)
+        y = top + first * self._row_height - max(top, 0)
+        for dex in range(first, len(self._rows)):
+            if y >= self._view_height:
+                break
+            if dex == self._selected:
+                self._surf.fill(
+                    (0, 0, 255),
+                    (0, y, self._width, self._row_height),
+                )
+            text = text_cache.render(
+                self._font, self._rows[dex], (255, 255, 255),
+            )
+            self._surf.blit(text, (0, y))
+            y += self._row_height
+
+    def handle_event(self: Self, event: pg.Event) -> None:
+        if (event.type == pg.MOUSEBUTTONDOWN
+            and event.button == 1
+            and self._rect.collidepoint(event.pos)):
+                dex = (event.pos[1] - self._rect.y) // self._row_height
+                if self._func is not None and dex < len(self._rows):
+                    self._func(dex)
+
+
+class Slider(_Widget):
+    # COLORS
+    # track: outline blue
+    # knob: red
+    # value is between 0 and 1. on_change is only called when the user
+    # drags it, which lasts from a click on it until the button is let go.
+
+    def __init__(self: Self,
+                 pos: Point,
+                 width: int,
+                 height: int,
+                 on_change: Optional[Callable]=None) -> None:
+
+        super().__init__(pos, (width, height))
+        self._width = width
+        self._height = height
+        self._knob = max(height // 2, 2) # knob width
+        self._on_change = on_change
+        self._value = 0
+        self._knob_x = None # where the knob is drawn
+        self._dragging = False
+        self.value = 0
+
+    @property
+    def value(self: Self) -> float:
+        return self._value
+
+    @value.setter
+    def value(self: Self, value: Real) -> None:
+        self._value = pg.math.clamp(value, 0, 1)
+        knob_x = round(self._value * (self._width - self._knob))
+        if knob_x != self._knob_x: # only redrawn when the knob moves
+            self._knob_x = knob_x
+            self._surf.fill((0, 0, 0))
+            pg.draw.rect(
+                self._surf,
+                (0, 0, 255),
+                (0, 0, self._width, self._height),
+                width=1,
+            )
+            self._surf.fill(
+                (255, 0, 0), (knob_x, 0, self._knob, self._height),
+            )
+            self.revision += 1
+
+    @property
+    def dragging(self: Self) -> bool:
+        return self._dragging
+
+    def _drag(self: Self, x: Real) -> None:
+        old = self._value
+        self.value = (
+            (x - self._rect.x - self._knob / 2) / (self._width - self._knob)
+        )
+        if self._value != old and self._on_change is not None:
+            self._on_change()
+
+    def handle_event(self: Self, event: pg.Event) -> None:
+        if (event.type == pg.MOUSEBUTTONDOWN
+            and event.button == 1
+            and self._rect.collidepoint(event.pos)):
+                self._dragging = True
+                self._drag(event.pos[0])
+
+    def update(self: Self,
+               mouse_pos: Point,
+               mouse_pressed: tuple[bool]) -> None:
+        if self._dragging:
+            if mouse_pressed[0]:
+                self._drag(mouse_pos[0])
+            else:
+                self._dragging = False
+
+
 class Panel(object):
-    def __init__(self: Self, widgets: set[_Widget], min_scroll: Real) -> None:
+    # Widgets are composited over bgcolor into one surface the size of
+    # rect, which is only rebuilt when a shown widget's surface changes or
+    # the panel scrolls. Widgets outside rect are neither updated nor drawn;
+    # which ones are inside is worked out again on the same occasions.
+    # min_scroll defaults to following the content, so the last widget
+    # can be scrolled up to the bottom of rect.
+    # Events are routed by type: clicks go only to the shown widgets under
+    # the cursor, found through horizontal bands of rect, and key presses
+    # only to the focused Input.
+
+    _BAND_HEIGHT = 32
+
+    def __init__(self: Self,
+                 widgets: set[_Widget],
+                 rect: RectLike,
+                 min_scroll: Optional[Real]=None,
+                 bgcolor: ColorLike=(0, 0, 0)) -> None:
         self._widgets = widgets
+        self._rect = pg.Rect(rect)
         self._scroll = 0
         self._min_scroll = min_scroll
+        self._bgcolor = bgcolor
+        self._surf = pg.Surface(self._rect.size)
+        self._shown = None # widgets inside rect, None if unknown
+        self._drawn = None # (surf, revision, overlay) of shown widgets
+        self._bands = None # band -> shown widgets, None if unknown
+        self._focus = None # focused Input
+        self._routes = {
+            pg.MOUSEBUTTONDOWN: self._route_click,
+            pg.KEYDOWN: self._route_key,
+            pg.TEXTINPUT: self._route_key,
+            pg.MOUSEWHEEL: self._route_wheel,
+        }
+
+    @property
+    def min_scroll(self: Self) -> Real:
+        if self._min_scroll is not None:
+            return self._min_scroll
+        bottom = max((widget.bottom for widget in self._widgets), default=0)
+        return min(self._rect.bottom - bottom, 0)
 
     @property
     def focused(self: Self) -> bool:
-        return any(
-            isinstance(widget, Input)
-            and widget._focused
-            for widget in self._widgets
-        )
+        return self._focus is not None
 
     @property
     def widgets(self: Self) -> set[_Widget]:
@@ -360,6 +677,10 @@ class Panel(object):
     @widgets.setter
     def widgets(self: Self, value: set[_Widget]) -> None:
         self._widgets = value
+        self._shown = None
+        self._bands = None
+        if self._focus not in value:
+            self._focus = None
     
     @property
     def scroll(self: Self) -> Real:
@@ -367,23 +688,101 @@ class Panel(object):
 
     @scroll.setter
     def scroll(self: Self, value: Real) -> None:
-        self._scroll = pg.math.clamp(value, self._min_scroll, 0)
+        self._scroll = pg.math.clamp(value, self.min_scroll, 0)
         for widget in self._widgets:
             widget.scroll = self._scroll
+        self._shown = None
+        self._bands = None
+
+    def _cull(self: Self) -> list[_Widget]:
+        return [
+            widget for widget in self._widgets
+            if widget.pos[1] < self._rect.bottom
+            and widget.bottom + self._scroll > self._rect.top
+        ]
+
+    def _band_index(self: Self) -> dict[int, list[_Widget]]:
+        if self._bands is None:
+            self._bands = {}
+            shown = self._shown if self._shown is not None else self._cull()
+            for widget in shown:
+                if type(widget).handle_event is _Widget.handle_event:
+                    continue # ignores events
+                rect = widget._rect.clip(self._rect)
+                if not rect:
+                    continue
+                for band in range(rect.top // self._BAND_HEIGHT,
+                                  (rect.bottom - 1) // self._BAND_HEIGHT + 1):
+                    self._bands.setdefault(band, []).append(widget)
+        return self._bands
 
     def handle_event(self: Self, event: pg.Event) -> None:
-        for widget in self._widgets:
+        route = self._routes.get(event.type)
+        if route is not None:
+            route(event)
+
+    def _route_click(self: Self, event: pg.Event) -> None:
+        hit = []
+        if self._rect.collidepoint(event.pos):
+            hit = [
+                widget for widget in self._band_index().get(
+                    event.pos[1] // self._BAND_HEIGHT, (),
+                )
+                if widget._rect.collidepoint(event.pos)
+            ]
+        if self._focus is not None and self._focus not in hit:
+            self._focus.focused = 0
+            self._focus = None
+        for widget in hit:
             widget.handle_event(event)
-        if event.type == pg.MOUSEWHEEL:
-            self.scroll += event.precise_y * 10
+            if isinstance(widget, Input) and widget.focused:
+                self._focus = widget
+
+    def _route_key(self: Self, event: pg.Event) -> None:
+        if self._focus is not None:
+            self._focus.handle_event(event)
+            if not self._focus.focused: # escaped
+                self._focus = None
+
+    def _route_wheel(self: Self, event: pg.Event) -> None:
+        self.scroll += event.precise_y * 10
 
     def update(self: Self,
                mouse_pos: Point,
-               mouse_pressed: tuple[bool]) -> None:
-        for widget in self._widgets:
-            widget.update(mouse_pos, mouse_pressed)
+               mouse_pressed: tuple[bool]) -> bool:
+        # returns whether the panel looks different than last time
+        if self._scroll and self._scroll < self.min_scroll: # got shorter
+            self.scroll = self._scroll
+        updated = set()
+        if self._shown is not None:
+            # surfaces have no __eq__, so == compares them by identity, and
+            # keeping them in _drawn stops their ids being reused
+            drawn = []
+            for widget in self._shown:
+                widget.update(mouse_pos, mouse_pressed)
+                drawn.append((widget.surf, widget.revision, widget.overlay))
+            if drawn == self._drawn:
+                return False
+            updated.update(self._shown)
+
+        # a widget that changed may have grown into or out of view
+        self._shown = self._cull()
+        self._bands = None
+        for widget in self._shown:
+            if widget not in updated:
+                widget.update(mouse_pos, mouse_pressed)
+        self._drawn = []
+        self._surf.fill(self._bgcolor)
+        for widget in self._shown:
+            surf, overlay = widget.surf, widget.overlay
+            self._drawn.append((surf, widget.revision, overlay))
+            x = widget.pos[0] - self._rect.x
+            y = widget.pos[1] - self._rect.y
+            self._surf.blit(surf, (x, y))
+            if overlay is not None:
+                color, rect = overlay
+                self._surf.fill(color, pg.Rect(rect).move(x, y))
+        return True
 
     def render(self: Self, surf: pg.Surface) -> None:
-        for widget in self._widgets:
-            surf.blit(widget.surf, widget.pos)
-
+        surf.blit(self._surf, self._rect)
@@ -0,0 +1,192 @@
+import itertools
+from array import array
+from numbers import Real
+from typing import Self
+from typing import Iterable
+from typing import Iterator
+
+
+# View of one waypoint in a Path. It refers to the waypoint by index, so it
+# goes stale when points are inserted or deleted before it.
+class Waypoint(object):
+    __slots__ = ('_path', '_dex')
+
+    def __init__(self: Self, path: 'Path', dex: int) -> None:
+        self._path = path
+        self._dex = dex
+
+    def __repr__(self: Self) -> str:
+        return f'Waypoint({self.x}, {self.y}, {self.heading})'
+
+    def __eq__(self: Self, other: object) -> bool:
+        if isinstance(other, Waypoint):
+            other = other.pose
+        return self.pose == other
+
+    @property
+    def index(self: Self) -> int:
+        return self._dex
+
+    @property
+    def x(self: Self) -> float:
+        return self._path._x[self._dex]
+
+    @property
+    def y(self: Self) -> float:
+        return self._path._y[self._dex]
+
+    @property
+    def pos(self: Self) -> tuple[float, float]:
+        return (self._path._x[self._dex], self._path._y[self._dex])
+
+    @property
+    def heading(self: Self) -> float:
+        return self._path._heading[self._dex]
+
+    @property
+    def pose(self: Self) -> tuple[float, float, float]:
+        return (self.x, self.y, self.heading)
+
+
+# Shared by every Path so no two different states ever have the same
+# version, even across copies.
+_versions = itertools.count(1)
+
+
+# Waypoints in field inches, stored column-wise in contiguous arrays.
+# version changes on every edit so derived data (screen positions,
+# rendered text) can tell when it is stale.
+class Path(object):
+    def __init__(self: Self,
+                 poses: Iterable[tuple[Real, Real, Real]]=()) -> None:
+        self._x = array('d')
+        self._y = array('d')
+        self._heading = array('d')
+        self.version = next(_versions)
+        for pose in poses:
+            self.append(*pose)
+
+    @classmethod
+    def from_columns(cls: type,
+                     xs: array,
+                     ys: array,
+                     headings: array) -> 'Path':
+        # takes the arrays as they are, without copying
+        if not len(xs) == len(ys) == len(headings):
+            raise ValueError('columns have different lengths')
+        path = cls()
+        path._x = xs
+        path._y = ys
+        path._heading = headings
+        return path
+
+    def __len__(self: Self) -> int:
+        return len(self._x)
+
+    def __getitem__(self: Self, dex: int) -> Waypoint:
+        if dex < 0:
+            dex += len(self._x)
+        if not 0 <= dex < len(self._x):
+            raise IndexError('path index out of range')
+        return Waypoint(self, dex)
+
+    def __iter__(self: Self) -> Iterator[Waypoint]:
+        for dex in range(len(self._x)):
+            yield Waypoint(self, dex)
+
+    def __eq__(self: Self, other: object) -> bool:
+        if not isinstance(other, Path):
+            return NotImplemented
+        return (
+            self._x == other._x
+            and self._y == other._y
+            and self._heading == other._heading
+        )
+
+    def __repr__(self: Self) -> str:
+        return f'Path({list(self.poses())})'
+
+    @property
+    def xs(self: Self) -> array:
+        return self._x
+
+    @property
+    def ys(self: Self) -> array:
+        return self._y
+
+    @property
+    def headings(self: Self) -> array:
+        return self._heading
+
+    def poses(self: Self) -> Iterator[tuple[float, float, float]]:
+        return zip(self._x, self._y, self._heading)
+
+    def copy(self: Self) -> 'Path':
+        path = Path()
+        path._x = array('d', self._x)
+        path._y = array('d', self._y)
+        path._heading = array('d', self._heading)
+        path.version = self.version
+        return path
+
+    def insert(self: Self,
+               dex: int,
+               x: Real,
+               y: Real,
+               heading: Real=0) -> None:
+        self._x.insert(dex, x)
+        self._y.insert(dex, y)
+        self._heading.insert(dex, heading)
+        self.version = next(_versions)
+
+    def append(self: Self, x: Real, y: Real, heading: Real=0) -> None:
+        self._x.append(x)
+        self._y.append(y)
+        self._heading.append(heading)
+        self.version = next(_versions)
+
+    def delete(self: Self, dex: int) -> None:
+        del self._x[dex]
+        del self._y[dex]
+        del self._heading[dex]
+        self.version = next(_versions)
+
+    def set_pose(self: Self,
+                 dex: int,
+                 x: Real,
+                 y: Real,
+                 heading: Real) -> None:
+        self._x[dex] = x
+        self._y[dex] = y
+        self._heading[dex] = heading
+        self.version = next(_versions)
+
+    def assign(self: Self, other: 'Path') -> None:
+        # take other's points, keeping this object
+        self._x = array('d', other._x)
+        self._y = array('d', other._y)
+        self._heading = array('d', other._heading)
+        self.version = other.version
+
+    def clear(self: Self) -> None:
+        self._x = array('d')
+        self._y = array('d')
+        self._heading = array('d')
+        self.version = next(_versions)
+
+    def flip(self: Self) -> None:
+        # mirror across the x axis
+        self._y = array('d', [-y for y in self._y])
+        self._heading = array('d', [-heading for heading in self._heading])
+        self.version = next(_versions)
+
+    def transformed(self: Self,
+                    scale: tuple[Real, Real],
+                    offset: tuple[Real, Real]) -> list[tuple[float, float]]:
+        # every point through the same affine map, in one pass
+        scale_x, scale_y = scale
+        offset_x, offset_y = offset
+        return [
+            (x * scale_x + offset_x, y * scale_y + offset_y)
+            for x, y in zip(self._x, self._y)
+        ]
@@ -0,0 +1,214 @@
+import sys
+import mmap
+import struct
+from array import array
+from typing import Self
+from typing import Iterator
+from typing import TextIO
+from typing import BinaryIO
+
+from path import Path
+
+
+# Path files come in two variants, both versioned.
+#
+# Text, for small hand-made paths: one waypoint per line as x, y and heading
+# in inches and degrees, separated by commas or spaces. Blank lines and
+# anything after a # are ignored. Saved files start with a
+# '# coyote path <version>' line; files without one are version 1.
+#
+# Binary, for long recorded paths: a 16 byte header (magic, version,
+# reserved, number of waypoints) followed by one record of little-endian
+# doubles x, y, heading per waypoint. The records can be used straight from
+# a memory map, see PathFileView.
+
+VERSION = 1
+
+_TEXT_HEADER = '# coyote path '
+_MAGIC = b'COYOTE\x00P'
+_HEADER = struct.Struct('<8sHHI')
+_RECORD = struct.Struct('<ddd')
+_CHUNK = 4096 # records written at a time
+
+
+def read_text(file: TextIO) -> Path:
+    xs, ys, headings = array('d'), array('d'), array('d')
+    number = 0
+    for number, line in enumerate(file, 1):
+        if number == 1 and line.startswith(_TEXT_HEADER):
+            version = line[len(_TEXT_HEADER):].strip()
+            if not version.isdigit() or int(version) > VERSION:
+                raise ValueError(f'unsupported path file version {version}')
+            continue
+        line = line.split('#', 1)[0].replace(',', ' ').split()
+        if not line:
+            continue
+        try:
+            x, y, heading = (float(value) for value in line)
+        except ValueError:
+            raise ValueError(
+                f'line {number}: expected x, y and heading, got {line}'
+            ) from None
+        xs.append(x)
+        ys.append(y)
+        headings.append(heading)
+    if not number: # a saved empty path still has its header line
+        raise ValueError('path file is empty')
+    return Path.from_columns(xs, ys, headings)
+
+
+def write_text(path: Path, file: TextIO) -> None:
+    file.write(f'{_TEXT_HEADER}{VERSION}\n')
+    file.writelines(
+        f'{x}, {y}, {heading}\n' for x, y, heading in path.poses()
+    )
+
+
+def _read_header(data: bytes) -> int:
+    # number of records, after checking the header
+    if len(data) < _HEADER.size:
+        raise ValueError('not a binary path file')
+    magic, version, _, count = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError('not a binary path file')
+    if version > VERSION:
+        raise ValueError(f'unsupported path file version {version}')
+    if len(data) < _HEADER.size + count * _RECORD.size:
+        raise ValueError('binary path file is truncated')
+    return count
+
+
+def _records(data: bytes, count: int) -> array:
+    # x, y, heading of every waypoint, interleaved
+    records = array('d')
+    records.frombytes(
+        data[_HEADER.size:_HEADER.size + count * _RECORD.size],
+    )
+    if sys.byteorder != 'little':
+        records.byteswap()
+    return records
+
+
+def read_binary(data: bytes) -> Path:
+    records = _records(data, _read_header(data))
+    return Path.from_columns(records[0::3], records[1::3], records[2::3])
+
+
+def write_binary(path: Path, file: BinaryIO) -> None:
+    # in chunks, so a thread writing a long path often lets go of the GIL
+    file.write(_HEADER.pack(_MAGIC, VERSION, 0, len(path)))
+    for start in range(0, len(path), _CHUNK):
+        end = min(start + _CHUNK, len(path))
+        records = array('d', bytes((end - start) * _RECORD.size))
+        records[0::3] = path.xs[start:end]
+        records[1::3] = path.ys[start:end]
+        records[2::3] = path.headings[start:end]
+        if sys.byteorder != 'little':
+            records.byteswap()
+        file.write(records)
+
+
+def is_binary(filename: str) -> bool:
+    with open(filename, 'rb') as file:
+        return file.read(len(_MAGIC)) == _MAGIC
+
+
+def load(filename: str) -> Path:
+    # either variant, told apart by the magic
+    if is_binary(filename):
+        with PathFileView(filename) as view:
+            return view.to_path()
+    with open(filename) as file:
+        return read_text(file)
+
+
+def is_path_file(filename: str) -> bool:
+    # whether the file starts like a saved path file of either variant,
+    # False if it can't be read
+    try:
+        with open(filename, 'rb') as file:
+            start = file.read(max(len(_MAGIC), len(_TEXT_HEADER)))
+    except OSError:
+        return False
+    return start.startswith((_MAGIC, _TEXT_HEADER.encode()))
+
+
+def save(path: Path, filename: str, binary: bool=False) -> None:
+    if binary:
+        with open(filename, 'wb') as file:
+            write_binary(path, file)
+    else:
+        with open(filename, 'w') as file:
+            write_text(path, file)
+
+
+# Read-only view of a binary path file through a memory map. Nothing is
+# parsed up front: xs, ys and headings are strided memoryviews into the
+# mapped records. Views taken from it have to be released before close().
+class PathFileView(object):
+    def __init__(self: Self, filename: str) -> None:
+        self._file = open(filename, 'rb')
+        try:
+            self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ,
+            )
+        except ValueError: # empty file
+            self._file.close()
+            raise ValueError('not a binary path file') from None
+        try:
+            self._count = _read_header(self._map)
+        except ValueError:
+            self.close()
+            raise
+        if sys.byteorder == 'little':
+            self._records = memoryview(self._map)[
+                _HEADER.size:_HEADER.size + self._count * _RECORD.size
+            ].cast('d')
+        else: # the records are not in native order, so a copy it is
+            self._records = memoryview(_records(self._map, self._count))
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args) -> None:
+        self.close()
+
+    def __len__(self: Self) -> int:
+        return self._count
+
+    def __getitem__(self: Self, dex: int) -> tuple[float, float, float]:
+        if dex < 0:
+            dex += self._count
+        if not 0 <= dex < self._count:
+            raise IndexError('path index out of range')
+        return tuple(self._records[dex * 3:dex * 3 + 3])
+
+    @property
+    def xs(self: Self) -> memoryview:
+        return self._records[0::3]
+
+    @property
+    def ys(self: Self) -> memoryview:
+        return self._records[1::3]
+
+    @property
+    def headings(self: Self) -> memoryview:
+        return self._records[2::3]
+
+    def poses(self: Self) -> Iterator[tuple[float, float, float]]:
+        records = self._records
+        return zip(records[0::3], records[1::3], records[2::3])
+
+    def to_path(self: Self) -> Path:
+        records = array('d')
+        records.frombytes(self._records.cast('B'))
+        return Path.from_columns(
+            records[0::3], records[1::3], records[2::3],
+        )
+
+    def close(self: Self) -> None:
+        if getattr(self, '_records', None) is not None:
+            self._records.release()
+            self._records = None
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,129 @@
+import math
+from array import array
+from numbers import Real
+from typing import Optional
+from typing import Sequence
+
+
+BLOCK = 32 # points per bounding box
+
+
+def simplify(xs: Sequence[Real],
+             ys: Sequence[Real],
+             headings: Sequence[Real],
+             tolerance: Real,
+             heading_tolerance: Real=math.inf,
+             start: int=0,
+             end: Optional[int]=None) -> list[int]:
+    # Ramer-Douglas-Peucker: indices of the fewest points from start to end
+    # (exclusive) that keep every dropped point within tolerance inches of
+    # the path between the kept ones around it, and its heading within
+    # heading_tolerance degrees. Headings are unwrapped and scaled into a
+    # third coordinate, so one distance covers both. Ranges left to split
+    # are kept on a stack, so long paths can't hit the recursion limit.
+    if tolerance <= 0 or heading_tolerance <= 0:
+        raise ValueError('simplify tolerances have to be positive')
+    if end is None:
+        end = len(xs)
+    if end - start < 3:
+        return list(range(start, end))
+    scale = tolerance / heading_tolerance # inches per degree
+    zs = array('d', [headings[start] * scale])
+    for dex in range(start + 1, end):
+        turn = (headings[dex] - headings[dex - 1] + 180) % 360 - 180
+        zs.append(zs[-1] + turn * scale)
+    xs = xs[start:end]
+    ys = ys[start:end]
+    count = len(xs)
+    tolerance_squared = tolerance * tolerance
+
+    # the center and half diagonal of the bounding box of every BLOCK
+    # points, so a range only looks at the points of the blocks that could
+    # hold a farther point than it has found, which on noisy paths is few
+    boxes = []
+    for low in range(0, count - BLOCK + 1, BLOCK):
+        high = low + BLOCK
+        box_xs, box_ys, box_zs = xs[low:high], ys[low:high], zs[low:high]
+        x_low, x_high = min(box_xs), max(box_xs)
+        y_low, y_high = min(box_ys), max(box_ys)
+        z_low, z_high = min(box_zs), max(box_zs)
+        boxes.append((
+            (x_low + x_high) / 2,
+            (y_low + y_high) / 2,
+            (z_low + z_high) / 2,
+            math.hypot(x_high - x_low, y_high - y_low, z_high - z_low) / 2,
+        ))
+
+    def errors(low: int, high: int) -> list[float]:
+        # squared distance to the segment of points low to high: to the
+        # line where the point projects onto it, else to the nearer end
+        return [
+            norm - dot * dot / length if 0 < dot < length
+            else norm if dot <= 0
+            else norm - 2 * dot + length
+            for x, y, z in zip(xs[low:high], ys[low:high], zs[low:high])
+            for ux, uy, uz in ((x - x1, y - y1, z - z1),)
+            for dot, norm in ((
+                ux * dx + uy * dy + uz * dz, ux * ux + uy * uy + uz * uz,
+            ),)
+        ]
+
+    def farthest(low: int, high: int) -> tuple[float, int]:
+        found = errors(low, high)
+        error = max(found)
+        return (error, low + found.index(error))
+
+    keep = [0, count - 1]
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        x1, y1, z1 = xs[first], ys[first], zs[first]
+        dx, dy, dz = xs[last] - x1, ys[last] - y1, zs[last] - z1
+        length = dx * dx + dy * dy + dz * dz
+        first_block = -(-(first + 1) // BLOCK)
+        last_block = last // BLOCK
+        if last_block - first_block < 2:
+            error, split = farthest(first + 1, last)
+        else:
+            # the ends that don't fill a block, then the blocks farthest
+            # first, until no point in them can be farther. A point is at
+            # most the half diagonal farther than its box's center; the
+            # slack covers rounding. Ties go to the first point, like max.
+            error, split = max(
+                farthest(first + 1, first_block * BLOCK)
+                if first_block * BLOCK > first + 1 else (-1.0, -1),
+                farthest(last_block * BLOCK, last)
+                if last_block * BLOCK < last else (-1.0, -1),
+                key=lambda found: (found[0], -found[1]),
+            )
+            bounds = []
+            for block in range(first_block, last_block):
+                center_x, center_y, center_z, radius = boxes[block]
+                ux, uy, uz = center_x - x1, center_y - y1, center_z - z1
+                dot = ux * dx + uy * dy + uz * dz
+                norm = ux * ux + uy * uy + uz * uz
+                center = (
+                    norm - dot * dot / length if 0 < dot < length
+                    else norm if dot <= 0
+                    else norm - 2 * dot + length
+                )
+                reach = math.sqrt(norm) + radius
+                bound = math.sqrt(max(center, 0.0)) + radius
+                bounds.append((
+                    bound * bound * (1 + 1e-9) + reach * reach * 1e-9, block,
+                ))
+            bounds.sort(reverse=True)
+            for bound, block in bounds:
+                if bound < error or bound <= tolerance_squared:
+                    break
+                found, at = farthest(block * BLOCK, (block + 1) * BLOCK)
+                if found > error or found == error and at < split:
+                    error, split = found, at
+        if error > tolerance_squared:
+            keep.append(split)
+            stack.append((first, split))
+            stack.append((split, last))
+    keep.sort()
+    return [start + dex for dex in keep]
@@ -0,0 +1,329 @@
+import math
+from bisect import bisect_left
+from numbers import Real
+from typing import Self
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+
+
+Pos = Sequence[Real]
+
+
+# Uniform grid over the path's points and segments, used for hit tests.
+# Entries are stored under order keys instead of indices so inserting or
+# deleting in the middle of the path does not renumber the whole grid; the
+# index of a key is found by bisecting the sorted key list.
+# Segment entries use the key of their end point, like the path loop does.
+# Boxes set with set_bounds, like the bounds of the curve ending at a
+# point, are kept under the point's key too and go away with it.
+class SpatialGrid(object):
+    def __init__(self: Self, cell_size: Real=32) -> None:
+        self._cell_size = cell_size
+        self._keys = []
+        self._pos = {}
+        self._point_cells = {}
+        self._segment_cells = {}
+        self._bounds = {}
+        self._bounds_cells = {}
+
+    def __len__(self: Self) -> int:
+        return len(self._keys)
+
+    def _cell(self: Self, pos: Pos) -> tuple[int, int]:
+        return (
+            math.floor(pos[0] / self._cell_size),
+            math.floor(pos[1] / self._cell_size),
+        )
+
+    def _cells_around(self: Self,
+                      pos: Pos,
+                      radius: Real) -> Iterator[tuple[int, int]]:
+        left, top = self._cell((pos[0] - radius, pos[1] - radius))
+        right, bottom = self._cell((pos[0] + radius, pos[1] + radius))
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                yield (x, y)
+
+    def _box_cells(self: Self,
+                   left: Real,
+                   top: Real,
+                   right: Real,
+                   bottom: Real) -> Iterator[tuple[int, int]]:
+        first_x, first_y = self._cell((left, top))
+        last_x, last_y = self._cell((right, bottom))
+        for x in range(first_x, last_x + 1):
+            for y in range(first_y, last_y + 1):
+                yield (x, y)
+
+    def _keys_in(self: Self,
+                 cells: dict,
+                 left: Real,
+                 top: Real,
+                 right: Real,
+                 bottom: Real,
+                 limit: Real) -> Optional[set]:
+        # keys in the cells the box is in, None once there are more than
+        # limit
+        keys = set()
+        for cell in self._box_cells(left, top, right, bottom):
+            keys.update(cells.get(cell, ()))
+            if len(keys) > limit:
+                return None
+        return keys
+
+    def _line_cells(self: Self,
+                    start: Pos,
+                    end: Pos) -> Iterator[tuple[int, int]]:
+        # Amanatides & Woo grid traversal
+        x0, y0 = start[0] / self._cell_size, start[1] / self._cell_size
+        x1, y1 = end[0] / self._cell_size, end[1] / self._cell_size
+        x, y = math.floor(x0), math.floor(y0)
+        end_x, end_y = math.floor(x1), math.floor(y1)
+        dx, dy = x1 - x0, y1 - y0
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        delta_x = abs(1 / dx) if dx else math.inf
+        delta_y = abs(1 / dy) if dy else math.inf
+        max_x = ((x + (dx > 0)) - x0) / dx if dx else math.inf
+        max_y = ((y + (dy > 0)) - y0) / dy if dy else math.inf
+        yield (x, y)
+        for _ in range(abs(end_x - x) + abs(end_y - y)):
+            if max_x < max_y:
+                x += step_x
+                max_x += delta_x
+            else:
+                y += step_y
+                max_y += delta_y
+            yield (x, y)
+
+    def _add(self: Self,
+             cells: dict,
+             key: Real,
+             where: Iterator[tuple[int, int]]) -> None:
+        for cell in where:
+            cells.setdefault(cell, set()).add(key)
+
+    def _discard(self: Self,
+                 cells: dict,
+                 key: Real,
+                 where: Iterator[tuple[int, int]]) -> None:
+        for cell in where:
+            entries = cells.get(cell)
+            if entries is not None:
+                entries.discard(key)
+                if not entries:
+                    del cells[cell]
+
+    def _add_segment(self: Self, dex: int) -> None:
+        if 0 < dex < len(self._keys):
+            key = self._keys[dex]
+            cells = self._line_cells(self._pos[self._keys[dex - 1]],
+                                     self._pos[key])
+            self._add(self._segment_cells, key, cells)
+
+    def _discard_segment(self: Self, dex: int) -> None:
+        if 0 < dex < len(self._keys):
+            key = self._keys[dex]
+            cells = self._line_cells(self._pos[self._keys[dex - 1]],
+                                     self._pos[key])
+            self._discard(self._segment_cells, key, cells)
+
+    def rebuild(self: Self, points: Sequence[Pos]) -> None:
+        self._keys = [float(dex) for dex in range(len(points))]
+        self._pos = {
+            key: (point[0], point[1])
+            for key, point in zip(self._keys, points)
+        }
+        self._point_cells = {}
+        self._segment_cells = {}
+        self._bounds = {}
+        self._bounds_cells = {}
+        for dex, key in enumerate(self._keys):
+            self._add(self._point_cells, key, (self._cell(self._pos[key]),))
+            self._add_segment(dex)
+
+    def insert(self: Self, dex: int, point: Pos) -> None:
+        if not self._keys:
+            key = 0.0
+        else:
+            low = self._keys[dex - 1] if dex else self._keys[0] - 1
+            high = (
+                self._keys[dex] if dex < len(self._keys)
+                else self._keys[-1] + 1
+            )
+            key = (low + high) / 2
+            if not low < key < high: # ran out of float precision
+                points = [self._pos[key] for key in self._keys]
+                points.insert(dex, point)
+                bounds = [self._bounds.get(key) for key in self._keys]
+                bounds.insert(dex, None)
+                self.rebuild(points)
+                for dex, box in enumerate(bounds):
+                    if box is not None:
+                        self.set_bounds(dex, box)
+                return None
+        self._discard_segment(dex)
+        self._keys.insert(dex, key)
+        self._pos[key] = (point[0], point[1])
+        self._add(self._point_cells, key, (self._cell(point),))
+        self._add_segment(dex)
+        self._add_segment(dex + 1)
+
+    def append(self: Self, point: Pos) -> None:
+        self.insert(len(self._keys), point)
+
+    def delete(self: Self, dex: int) -> None:
+        self._discard_segment(dex)
+        self._discard_segment(dex + 1)
+        key = self._keys.pop(dex)
+        pos = self._pos.pop(key)
+        self._discard(self._point_cells, key, (self._cell(pos),))
+        self._discard_bounds(key)
+        self._add_segment(dex)
+
+    def move(self: Self, dex: int, point: Pos) -> None:
+        key = self._keys[dex]
+        self._discard_segment(dex)
+        self._discard_segment(dex + 1)
+        self._discard(self._point_cells, key, (self._cell(self._pos[key]),))
+        self._pos[key] = (point[0], point[1])
+        self._add(self._point_cells, key, (self._cell(point),))
+        self._add_segment(dex)
+        self._add_segment(dex + 1)
+
+    def _discard_bounds(self: Self, key: Real) -> None:
+        box = self._bounds.pop(key, None)
+        if box is not None:
+            self._discard(self._bounds_cells, key, self._box_cells(*box))
+
+    def set_bounds(self: Self,
+                   dex: int,
+                   bounds: tuple[Real, Real, Real, Real]) -> None:
+        # (left, top, right, bottom) of what belongs to point dex
+        key = self._keys[dex]
+        self._discard_bounds(key)
+        self._bounds[key] = bounds
+        self._add(self._bounds_cells, key, self._box_cells(*bounds))
+
+    def discard_bounds(self: Self, dex: int) -> None:
+        self._discard_bounds(self._keys[dex])
+
+    def clear_bounds(self: Self) -> None:
+        self._bounds = {}
+        self._bounds_cells = {}
+
+    def pick_bounds(self: Self,
+                    left: Real,
+                    top: Real,
+                    right: Real,
+                    bottom: Real,
+                    limit: Real=math.inf) -> Optional[list[int]]:
+        # indices of the points whose bounds overlap the box, in order,
+        # None when more than limit bounds are near it
+        keys = self._keys_in(
+            self._bounds_cells, left, top, right, bottom, limit,
+        )
+        if keys is None:
+            return None
+        found = []
+        for key in keys:
+            box_left, box_top, box_right, box_bottom = self._bounds[key]
+            if (box_left <= right and left <= box_right
+                and box_top <= bottom and top <= box_bottom):
+                found.append(key)
+        found.sort()
+        return [bisect_left(self._keys, key) for key in found]
+
+    def pick(self: Self, pos: Pos, radius: Real) -> int:
+        # last point within radius, -1 if none
+        best = None
+        radius_squared = radius * radius
+        for cell in self._cells_around(pos, radius):
+            for key in self._point_cells.get(cell, ()):
+                point = self._pos[key]
+                distance = (
+                    (point[0] - pos[0]) ** 2 + (point[1] - pos[1]) ** 2
+                )
+                if (distance <= radius_squared
+                    and (best is None or key > best)):
+                    best = key
+        return -1 if best is None else bisect_left(self._keys, best)
+
+    def count(self: Self,
+              left: Real,
+              top: Real,
+              right: Real,
+              bottom: Real,
+              limit: Real=math.inf) -> int:
+        # points with left <= x < right and top <= y < bottom, counting
+        # stops at limit
+        count = 0
+        for cell in self._box_cells(left, top, right, bottom):
+            for key in self._point_cells.get(cell, ()):
+                point = self._pos[key]
+                if left <= point[0] < right and top <= point[1] < bottom:
+                    count += 1
+                    if count >= limit:
+                        return count
+        return count
+
+    def first(self: Self,
+              left: Real,
+              top: Real,
+              right: Real,
+              bottom: Real) -> int:
+        # first point with left <= x < right and top <= y < bottom, -1 if
+        # none
+        best = None
+        for cell in self._box_cells(left, top, right, bottom):
+            for key in self._point_cells.get(cell, ()):
+                point = self._pos[key]
+                if (left <= point[0] < right and top <= point[1] < bottom
+                    and (best is None or key < best)):
+                    best = key
+        return -1 if best is None else bisect_left(self._keys, best)
+
+    def segments_in(self: Self,
+                    left: Real,
+                    top: Real,
+                    right: Real,
+                    bottom: Real,
+                    limit: Real=math.inf) -> Optional[list[int]]:
+        # indices of the end points of the segments going through the
+        # cells the box is in, in order, None when there are more than
+        # limit
+        keys = self._keys_in(
+            self._segment_cells, left, top, right, bottom, limit,
+        )
+        if keys is None:
+            return None
+        return [bisect_left(self._keys, key) for key in sorted(keys)]
+
+    def pick_segment(self: Self, pos: Pos, distance: Real) -> int:
+        # index of the end point of the first segment within distance,
+        # -1 if none
+        best = None
+        distance_squared = distance * distance
+        for cell in self._cells_around(pos, distance):
+            for key in self._segment_cells.get(cell, ()):
+                if best is not None and key >= best:
+                    continue
+                dex = bisect_left(self._keys, key)
+                start = self._pos[self._keys[dex - 1]]
+                end = self._pos[key]
+                # https://stackoverflow.com/a/1501725/24845999
+                # projects point onto line segment
+                dx, dy = end[0] - start[0], end[1] - start[1]
+                length = dx * dx + dy * dy
+                t = 0
+                if length:
+                    t = (
+                        (pos[0] - start[0]) * dx + (pos[1] - start[1]) * dy
+                    ) / length
+                    t = min(max(t, 0), 1)
+                x = start[0] + t * dx - pos[0]
+                y = start[1] + t * dy - pos[1]
+                if x * x + y * y <= distance_squared:
+                    best = key
+        return -1 if best is None else bisect_left(self._keys, best)
@@ -0,0 +1,219 @@
+import math
+from array import array
+from numbers import Real
+from typing import Self
+from typing import Optional
+from typing import Sequence
+
+from spatial import SpatialGrid
+
+
+Pos = Sequence[Real]
+
+_bases = {} # number of intervals -> Hermite basis at every sample
+
+
+def _basis(intervals: int) -> tuple[array, array, array, array]:
+    # the four cubic Hermite basis functions at t = 0, 1/intervals, ... 1
+    basis = _bases.get(intervals)
+    if basis is None:
+        basis = (array('d'), array('d'), array('d'), array('d'))
+        for step in range(intervals + 1):
+            t = step / intervals
+            t2 = t * t
+            t3 = t2 * t
+            basis[0].append(2 * t3 - 3 * t2 + 1)
+            basis[1].append(t3 - 2 * t2 + t)
+            basis[2].append(-2 * t3 + 3 * t2)
+            basis[3].append(t3 - t2)
+        _bases[intervals] = basis
+    return basis
+
+
+# One sampled curve segment: its sample points, the arc length up to each
+# of them and its bounding box as (left, top, right, bottom).
+class Segment(object):
+    __slots__ = ('points', 'lengths', 'bounds')
+
+    def __init__(self: Self, xs: Sequence[Real], ys: Sequence[Real]) -> None:
+        self.points = list(zip(xs, ys))
+        self.lengths = array('d', [0.0])
+        length = 0.0
+        for dex in range(1, len(xs)):
+            length += math.hypot(xs[dex] - xs[dex - 1], ys[dex] - ys[dex - 1])
+            self.lengths.append(length)
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    @property
+    def length(self: Self) -> float:
+        return self.lengths[-1]
+
+    def distance_squared(self: Self, pos: Pos) -> float:
+        # to the nearest point of the sampled curve
+        best = math.inf
+        for (start_x, start_y), end in zip(self.points, self.points[1:]):
+            dx, dy = end[0] - start_x, end[1] - start_y
+            length = dx * dx + dy * dy
+            t = 0
+            if length:
+                t = (
+                    (pos[0] - start_x) * dx + (pos[1] - start_y) * dy
+                ) / length
+                t = min(max(t, 0), 1)
+            x = start_x + t * dx - pos[0]
+            y = start_y + t * dy - pos[1]
+            best = min(best, x * x + y * y)
+        return best
+
+
+# Cubic Hermite curve through a path's points with Catmull-Rom tangents:
+# half the vector between a point's neighbours, or to its one neighbour at
+# the ends. A segment's shape depends on the two points on either side of
+# it, so an edit to one point only invalidates the four segments around it.
+# Segments are sampled about every step pixels when first used; the
+# points are passed in on every call, like SpatialGrid's owner keeps them.
+# With the grid of those points, the bounds of every sampled segment are
+# kept in it under the segment's end point, so near() and pick() only look
+# at the segments around a place instead of walking all of them.
+class Spline(object):
+    def __init__(self: Self,
+                 step: Real=12,
+                 max_intervals: int=24,
+                 grid: Optional[SpatialGrid]=None) -> None:
+        self.step = step
+        self.max_intervals = max_intervals
+        self.builds = 0 # segments sampled so far
+        self._grid = grid
+        self._segments = []
+
+    def __len__(self: Self) -> int:
+        return len(self._segments)
+
+    def _invalidate(self: Self, first: int, last: int) -> None:
+        for dex in range(max(first, 0), min(last + 1, len(self._segments))):
+            if self._grid is not None and self._segments[dex] is not None:
+                self._grid.discard_bounds(dex + 1)
+            self._segments[dex] = None
+
+    def reset(self: Self, count: int) -> None:
+        # for count points, none of them sampled yet
+        self._segments = [None] * max(count - 1, 0)
+        if self._grid is not None:
+            self._grid.clear_bounds()
+
+    def insert(self: Self, dex: int, count: int) -> None:
+        # point dex was inserted, there are count points now
+        if count < 2:
+            self._segments = []
+        else:
+            self._segments.insert(min(max(dex - 1, 0), len(self)), None)
+        self._invalidate(dex - 2, dex + 1)
+
+    def delete(self: Self, dex: int, count: int) -> None:
+        # point dex was deleted, there are count points now
+        if dex == 0 and count and self._grid is not None:
+            # the first segment was kept under the new first point
+            self._grid.discard_bounds(0)
+        if count < 2:
+            self._segments = []
+        else:
+            del self._segments[min(max(dex - 1, 0), len(self) - 1)]
+        self._invalidate(dex - 2, dex)
+
+    def move(self: Self, dex: int) -> None:
+        self._invalidate(dex - 2, dex + 1)
+
+    def _tangent(self: Self,
+                 points: Sequence[Pos],
+                 dex: int) -> tuple[float, float]:
+        before = points[max(dex - 1, 0)]
+        after = points[min(dex + 1, len(points) - 1)]
+        scale = 0.5 if 0 < dex < len(points) - 1 else 1
+        return (
+            (after[0] - before[0]) * scale,
+            (after[1] - before[1]) * scale,
+        )
+
+    def segment(self: Self, points: Sequence[Pos], dex: int) -> Segment:
+        # the curve from points[dex] to points[dex + 1]
+        segment = self._segments[dex]
+        if segment is not None:
+            return segment
+        (x1, y1), (x2, y2) = points[dex], points[dex + 1]
+        tangent_x1, tangent_y1 = self._tangent(points, dex)
+        tangent_x2, tangent_y2 = self._tangent(points, dex + 1)
+        # the Bezier control polygon is never shorter than the curve
+        length = (
+            math.hypot(tangent_x1, tangent_y1) / 3
+            + math.hypot(
+                x2 - tangent_x2 / 3 - x1 - tangent_x1 / 3,
+                y2 - tangent_y2 / 3 - y1 - tangent_y1 / 3,
+            )
+            + math.hypot(tangent_x2, tangent_y2) / 3
+        )
+        intervals = max(
+            min(math.ceil(length / self.step), self.max_intervals), 1,
+        )
+        basis = tuple(zip(*_basis(intervals)))
+        segment = Segment(
+            [
+                a * x1 + b * tangent_x1 + c * x2 + d * tangent_x2
+                for a, b, c, d in basis
+            ],
+            [
+                a * y1 + b * tangent_y1 + c * y2 + d * tangent_y2
+                for a, b, c, d in basis
+            ],
+        )
+        self._segments[dex] = segment
+        self.builds += 1
+        if self._grid is not None:
+            self._grid.set_bounds(dex + 1, segment.bounds)
+        return segment
+
+    def segments(self: Self, points: Sequence[Pos]) -> list[Segment]:
+        return [self.segment(points, dex) for dex in range(len(self))]
+
+    def near(self: Self,
+             points: Sequence[Pos],
+             left: Real,
+             top: Real,
+             right: Real,
+             bottom: Real,
+             limit: Real=math.inf) -> Optional[list[int]]:
+        # indices of the segments whose bounds overlap the box, in order,
+        # None when the grid has more than limit near it
+        if self._grid is None:
+            return [
+                dex for dex, segment in enumerate(self.segments(points))
+                if segment.bounds[0] <= right and left <= segment.bounds[2]
+                and segment.bounds[1] <= bottom and top <= segment.bounds[3]
+            ]
+        if None in self._segments: # only sampled ones are in the grid
+            for dex, segment in enumerate(self._segments):
+                if segment is None:
+                    self.segment(points, dex)
+        found = self._grid.pick_bounds(left, top, right, bottom, limit)
+        if found is None:
+            return None
+        return [dex - 1 for dex in found]
+
+    def pick(self: Self,
+             points: Sequence[Pos],
+             pos: Pos,
+             distance: Real) -> int:
+        # index of the end point of the first segment within distance,
+        # -1 if none, like SpatialGrid.pick_segment
+        distance_squared = distance * distance
+        for dex in self.near(
+            points,
+            pos[0] - distance,
+            pos[1] - distance,
+            pos[0] + distance,
+            pos[1] + distance,
+        ):
+            if self.segment(points, dex).distance_squared(pos) <= (
+                distance_squared
+            ):
+                return dex + 1
+        return -1